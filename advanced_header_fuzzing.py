@@ -4,8 +4,13 @@
 import requests
 import json
 from tabulate import tabulate
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
+
+from fingerprint import compare, IDENTICAL
+from probe_engine import run_probes
+from rate_limit import HostRateLimiter, print_rate_limits
+from response_stream import read_body
+from result_store import save_run
+from waf_signatures import default_signatures
 
 # Disable SSL warnings
 requests.packages.urllib3.disable_warnings()
@@ -55,194 +60,242 @@ header_variations = {
     },
 }
 
-print("=" * 140)
-print("ADVANCED HEADER FUZZING - Testing WAF Response Variations")
-print("=" * 140)
+# WAF vendor and score come from waf_signatures.json
+signatures = default_signatures()
 
-all_results = {}
+# has_challenge / has_blocked keep their original meaning: these words in the
+# body. The signature categories are broader (captcha pages, 403/503 statuses)
+CHALLENGE_MARKERS = ("challenge", "verify")
+BLOCKED_MARKERS = ("blocked", "access denied")
 
-for site in sites:
-    print(f"\n{'='*140}")
-    print(f"Target: {site}")
-    print(f"{'='*140}\n")
+def build_response_data(job, r):
+    site, headers, variation_name = job
+    
+    # Extract interesting response headers
+    waf_headers = {
+        "CF-Ray": r.headers.get("CF-Ray", "---"),
+        "CF-Cache-Status": r.headers.get("CF-Cache-Status", "---"),
+        "Server": r.headers.get("Server", "---"),
+        "X-Frame-Options": r.headers.get("X-Frame-Options", "---"),
+        "X-Content-Type-Options": r.headers.get("X-Content-Type-Options", "---"),
+        "Strict-Transport-Security": r.headers.get("Strict-Transport-Security", "---")[:30],
+    }
     
-    baseline_response = None
-    site_results = []
-    site_details = {}
+    body = read_body(r, indicators=CHALLENGE_MARKERS + BLOCKED_MARKERS, fingerprint=True, waf=signatures)
+    waf = body["waf"]
+    found = body["indicators"]
     
-    for variation_name, headers in header_variations.items():
-        try:
-            # Create session with retries
-            session = requests.Session()
-            retry = Retry(connect=1, backoff_factor=0.5)
-            adapter = HTTPAdapter(max_retries=retry)
-            session.mount('http://', adapter)
-            session.mount('https://', adapter)
-            
-            r = session.get(site, headers=headers, timeout=10, verify=False, allow_redirects=True)
-            
-            # Extract interesting response headers
-            waf_headers = {
-                "CF-Ray": r.headers.get("CF-Ray", "---"),
-                "CF-Cache-Status": r.headers.get("CF-Cache-Status", "---"),
-                "Server": r.headers.get("Server", "---"),
-                "X-Frame-Options": r.headers.get("X-Frame-Options", "---"),
-                "X-Content-Type-Options": r.headers.get("X-Content-Type-Options", "---"),
-                "Strict-Transport-Security": r.headers.get("Strict-Transport-Security", "---")[:30],
-            }
-            
-            response_data = {
-                "variation": variation_name,
-                "status": r.status_code,
-                "content_length": len(r.text),
-                "headers_sent": headers,
-                "response_headers": waf_headers,
-                "has_challenge": "challenge" in r.text.lower() or "verify" in r.text.lower(),
-                "has_blocked": "blocked" in r.text.lower() or "access denied" in r.text.lower(),
-            }
-            
+    return {
+        "variation": variation_name,
+        "status": r.status_code,
+        "content_length": body["length"],
+        "truncated": body["truncated"],
+        "body_fingerprint": body["fingerprint"],
+        "headers_sent": headers,
+        "response_headers": waf_headers,
+        "has_challenge": any(found[m] for m in CHALLENGE_MARKERS),
+        "has_blocked": any(found[m] for m in BLOCKED_MARKERS),
+        "waf_vendor": waf["vendor"],
+        "waf_score": waf["score"],
+    }
+
+def build_error(job, e):
+    site, headers, variation_name = job
+    if isinstance(e, requests.exceptions.Timeout):
+        status, changed, alert = "TIMEOUT", "⚠️", "Request timeout"
+    elif isinstance(e, requests.exceptions.ConnectionError):
+        status, changed, alert = "ERROR", "🔴", "Connection blocked"
+    else:
+        status, changed, alert = "ERROR", "❌", str(e)[:30]
+    return {
+        "variation": variation_name,
+        "error": str(e),
+        "row": {
+            "Headers": variation_name,
+            "Status": status,
+            "Length": "---",
+            "CF-Ray": "---",
+            "Changed": changed,
+            "Alerts": alert,
+        },
+    }
+
+def main():
+    """Probe the WAF-protected sites with every header variation and report the anomalies."""
+    print("=" * 140)
+    print("ADVANCED HEADER FUZZING - Testing WAF Response Variations")
+    print("=" * 140)
+
+    all_results = {}
+
+    # Back off per host on 429/503 and retry throttled responses before recording them
+    limiter = HostRateLimiter()
+
+    # Send every site x variation request concurrently, then compare per site
+    jobs = [(site, headers, name) for site in sites for name, headers in header_variations.items()]
+    responses = {}
+    for (site, _, name), response_data in zip(jobs, run_probes(jobs, build_response_data, build_error,
+                                                                timeout=10, verify=False, stream=True,
+                                                                limiter=limiter, retries=2)):
+        responses.setdefault(site, {})[name] = response_data
+
+    for site in sites:
+        print(f"\n{'='*140}")
+        print(f"Target: {site}")
+        print(f"{'='*140}\n")
+
+        baseline_response = None
+        site_results = []
+        site_details = {}
+
+        for variation_name, response_data in responses.get(site, {}).items():
+            if "error" in response_data:
+                site_results.append(response_data["row"])
+                continue
+
+            status = response_data["status"]
+            length = response_data["content_length"]
+            cf_ray = response_data["response_headers"].get("CF-Ray", "---")[:20]
             site_details[variation_name] = response_data
-            
+
             # Store baseline
             if variation_name == "baseline":
                 baseline_response = response_data
                 site_results.append({
                     "Headers": variation_name,
-                    "Status": r.status_code,
-                    "Length": len(r.text),
-                    "CF-Ray": waf_headers.get("CF-Ray", "---")[:20],
+                    "Status": status,
+                    "Length": length,
+                    "CF-Ray": cf_ray,
                     "Changed": "BASELINE",
                     "Alerts": "---",
                 })
+            elif baseline_response is None:
+                site_results.append({
+                    "Headers": variation_name,
+                    "Status": status,
+                    "Length": length,
+                    "CF-Ray": cf_ray,
+                    "Changed": "",
+                    "Alerts": "(no baseline)",
+                })
             else:
                 # Compare to baseline
-                status_changed = baseline_response["status"] != r.status_code
-                length_changed = baseline_response["content_length"] != len(r.text)
-                
+                status_changed = baseline_response["status"] != status
+                length_changed = baseline_response["content_length"] != length
+                body_similarity = compare(baseline_response["body_fingerprint"], response_data["body_fingerprint"])
+                response_data["body_similarity"] = body_similarity
+
                 alerts = []
                 if status_changed:
-                    alerts.append(f"Status {baseline_response['status']}→{r.status_code}")
+                    alerts.append(f"Status {baseline_response['status']}→{status}")
                 if length_changed:
-                    diff = len(r.text) - baseline_response["content_length"]
+                    diff = length - baseline_response["content_length"]
                     alerts.append(f"Length {diff:+d}b")
+                if body_similarity != IDENTICAL:
+                    alerts.append(f"Body {body_similarity}")
                 if response_data["has_challenge"] and not baseline_response.get("has_challenge"):
                     alerts.append("Challenge page detected")
                 if response_data["has_blocked"] and not baseline_response.get("has_blocked"):
                     alerts.append("Blocked/Denied detected")
-                
+
                 change_indicator = "🔴" if alerts else ""
-                
+
                 site_results.append({
                     "Headers": variation_name,
-                    "Status": r.status_code,
-                    "Length": len(r.text),
-                    "CF-Ray": waf_headers.get("CF-Ray", "---")[:20],
+                    "Status": status,
+                    "Length": length,
+                    "CF-Ray": cf_ray,
                     "Changed": change_indicator,
                     "Alerts": "; ".join(alerts) if alerts else "---",
                 })
-            
+
             all_results[site] = site_details
-            
-        except requests.exceptions.Timeout:
-            site_results.append({
-                "Headers": variation_name,
-                "Status": "TIMEOUT",
-                "Length": "---",
-                "CF-Ray": "---",
-                "Changed": "⚠️",
-                "Alerts": "Request timeout",
-            })
-        except requests.exceptions.ConnectionError as e:
-            site_results.append({
-                "Headers": variation_name,
-                "Status": "ERROR",
-                "Length": "---",
-                "CF-Ray": "---",
-                "Changed": "🔴",
-                "Alerts": "Connection blocked",
-            })
-        except Exception as e:
-            site_results.append({
-                "Headers": variation_name,
-                "Status": "ERROR",
-                "Length": "---",
-                "CF-Ray": "---",
-                "Changed": "❌",
-                "Alerts": str(e)[:30],
-            })
-    
-    print(tabulate(site_results, headers="keys", tablefmt="grid"))
 
-# Detailed anomaly analysis
-print(f"\n\n{'='*140}")
-print("DETAILED ANOMALY ANALYSIS")
-print(f"{'='*140}\n")
+        print(tabulate(site_results, headers="keys", tablefmt="grid"))
 
-for site, variations in all_results.items():
-    print(f"\n📍 {site}")
-    print("-" * 140)
-    
-    if "baseline" not in variations:
-        print("  (No baseline found)")
-        continue
-    
-    baseline = variations["baseline"]
-    anomalies_found = False
-    
-    for var_name, var_data in variations.items():
-        if var_name == "baseline":
+    print_rate_limits(limiter)
+
+    # Detailed anomaly analysis
+    print(f"\n\n{'='*140}")
+    print("DETAILED ANOMALY ANALYSIS")
+    print(f"{'='*140}\n")
+
+    for site, variations in all_results.items():
+        print(f"\n📍 {site}")
+        print("-" * 140)
+
+        if "baseline" not in variations:
+            print("  (No baseline found)")
             continue
-        
-        status_diff = var_data["status"] != baseline["status"]
-        length_diff = var_data["content_length"] != baseline["content_length"]
-        challenge_new = var_data.get("has_challenge") and not baseline.get("has_challenge")
-        blocked_new = var_data.get("has_blocked") and not baseline.get("has_blocked")
-        
-        if status_diff or length_diff or challenge_new or blocked_new:
-            print(f"\n  🔴 {var_name.upper()}")
-            print(f"     Headers: {dict(var_data['headers_sent'])}")
-            if status_diff:
-                print(f"     🔔 Status: {baseline['status']} → {var_data['status']}")
-            if length_diff:
-                diff = var_data['content_length'] - baseline['content_length']
-                print(f"     🔔 Length: {baseline['content_length']} → {var_data['content_length']} ({diff:+d} bytes)")
-            if challenge_new:
-                print(f"     🔔 Challenge/Verification page detected")
-            if blocked_new:
-                print(f"     🔔 Access blocked/denied message found")
-            anomalies_found = True
-    
-    if not anomalies_found:
-        print("  ✓ No anomalies detected with header variations")
-
-# Summary
-print(f"\n\n{'='*140}")
-print("SUMMARY")
-print(f"{'='*140}\n")
-
-print("Key Findings:\n")
-print("1. X-Forwarded-For header:")
-print("   → Used to spoof the client's real IP address")
-print("   → May be logged or filtered by WAF if not trusted")
-print()
-print("2. Referer header:")
-print("   → Setting suspicious referer may trigger WAF rules")
-print("   → Often used in CSRF attack detection")
-print()
-print("3. Accept-Language:")
-print("   → Usually safe, but combinations may be flagged")
-print()
-print("4. Proxy/Internal headers:")
-print("   → X-Forwarded-* and X-Real-IP headers indicate proxied requests")
-print("   → May reveal or bypass WAF if misconfigured")
-print()
-print("5. Scanner headers:")
-print("   → Custom headers with 'scan' or 'nmap' are typically blocked immediately")
-print()
-
-# Save results
-output_file = "/workspaces/Lab-4.1/advanced_header_fuzzing.json"
-with open(output_file, "w") as f:
-    json.dump(all_results, f, indent=2, default=str)
-
-print(f"\n✓ Detailed results saved to: {output_file}")
+
+        baseline = variations["baseline"]
+        anomalies_found = False
+
+        for var_name, var_data in variations.items():
+            if var_name == "baseline":
+                continue
+
+            status_diff = var_data["status"] != baseline["status"]
+            length_diff = var_data["content_length"] != baseline["content_length"]
+            challenge_new = var_data.get("has_challenge") and not baseline.get("has_challenge")
+            blocked_new = var_data.get("has_blocked") and not baseline.get("has_blocked")
+            body_diff = var_data.get("body_similarity", IDENTICAL) != IDENTICAL
+
+            if status_diff or length_diff or challenge_new or blocked_new or body_diff:
+                print(f"\n  🔴 {var_name.upper()}")
+                print(f"     Headers: {dict(var_data['headers_sent'])}")
+                if status_diff:
+                    print(f"     🔔 Status: {baseline['status']} → {var_data['status']}")
+                if length_diff:
+                    diff = var_data['content_length'] - baseline['content_length']
+                    print(f"     🔔 Length: {baseline['content_length']} → {var_data['content_length']} ({diff:+d} bytes)")
+                if body_diff:
+                    print(f"     🔔 Body: {var_data['body_similarity']}")
+                if challenge_new:
+                    print(f"     🔔 Challenge/Verification page detected")
+                if blocked_new:
+                    print(f"     🔔 Access blocked/denied message found")
+                anomalies_found = True
+
+        if not anomalies_found:
+            print("  ✓ No anomalies detected with header variations")
+
+    # Summary
+    print(f"\n\n{'='*140}")
+    print("SUMMARY")
+    print(f"{'='*140}\n")
+
+    print("Key Findings:\n")
+    print("1. X-Forwarded-For header:")
+    print("   → Used to spoof the client's real IP address")
+    print("   → May be logged or filtered by WAF if not trusted")
+    print()
+    print("2. Referer header:")
+    print("   → Setting suspicious referer may trigger WAF rules")
+    print("   → Often used in CSRF attack detection")
+    print()
+    print("3. Accept-Language:")
+    print("   → Usually safe, but combinations may be flagged")
+    print()
+    print("4. Proxy/Internal headers:")
+    print("   → X-Forwarded-* and X-Real-IP headers indicate proxied requests")
+    print("   → May reveal or bypass WAF if misconfigured")
+    print()
+    print("5. Scanner headers:")
+    print("   → Custom headers with 'scan' or 'nmap' are typically blocked immediately")
+    print()
+
+    # Save results
+    output_file = "/workspaces/Lab-4.1/advanced_header_fuzzing.json"
+    with open(output_file, "w") as f:
+        json.dump(all_results, f, indent=2, default=str)
+
+    save_run("advanced_header_fuzzing",
+             ((site, name, headers, all_results[site][name])
+              for site, headers, name in jobs if name in all_results.get(site, {})))
+
+    print(f"\n✓ Detailed results saved to: {output_file}")
+    return all_results
+
+if __name__ == "__main__":
+    main()
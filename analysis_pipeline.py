@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# analysis_pipeline.py - Concurrent fetching feeding a process pool of HTML analysers
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import http_cache
+import http_clients
+
+DEFAULT_FETCHERS = 16   # pages downloading at once
+DEFAULT_QUEUE = 64      # fetched pages waiting for a parser before fetchers pause
+
+
+def _fetch(url, timeout, verify, cache):
+    """Download one page; returns what the analysis stage needs, or an error."""
+    try:
+        if cache:
+            r = http_cache.cached_get(url, timeout=timeout, verify=verify)
+        else:
+            r = http_clients.get(url, timeout=timeout, verify=verify)
+    except Exception as e:
+        return {"error": str(e)}
+    return {
+        "status": r.status_code,
+        "content_length": len(r.content),
+        "content": r.content,
+        "encoding": r.encoding,
+        "headers": dict(r.headers),
+    }
+
+
+async def _pipeline(urls, analyze, on_result, fetchers, workers, queue_size, ordered, timeout, verify,
+                    cache, with_response):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    pending = iter(enumerate(urls))
+    results = {}
+    done_order = []
+    next_index = 0
+
+    def deliver(index, url, result):
+        nonlocal next_index
+        if not ordered:
+            done_order.append((url, result))
+            if on_result:
+                on_result(url, result)
+            return
+        results[index] = (url, result)
+        # Release results strictly in input order
+        while next_index in results:
+            item = results.pop(next_index)
+            done_order.append(item)
+            if on_result:
+                on_result(*item)
+            next_index += 1
+
+    async def fetcher():
+        for index, url in pending:
+            page = await loop.run_in_executor(io_pool, _fetch, url, timeout, verify, cache)
+            # Blocks while the parsers are behind: this is the backpressure
+            await queue.put((index, url, page))
+
+    async def parser():
+        while True:
+            index, url, page = await queue.get()
+            try:
+                if "error" in page:
+                    deliver(index, url, page)
+                    continue
+                content = page.pop("content")
+                encoding = page.pop("encoding")
+                headers = page.pop("headers")
+                job = partial(analyze, url, content, encoding)
+                if with_response:
+                    job = partial(job, status=page["status"], headers=headers)
+                try:
+                    analysis = await loop.run_in_executor(cpu_pool, job)
+                except Exception as e:
+                    analysis = {"error": f"analysis failed: {e}"}
+                deliver(index, url, {**page, **analysis})
+            finally:
+                queue.task_done()
+
+    with ThreadPoolExecutor(max_workers=fetchers) as io_pool, \
+            ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+        async def feed():
+            await asyncio.gather(*(fetcher() for _ in range(fetchers)))
+            await queue.join()
+
+        parsers = [asyncio.create_task(parser()) for _ in range(workers)]
+        feeding = asyncio.create_task(feed())
+        # Parsers only finish by raising (e.g. from on_result); stop everything
+        # then instead of waiting on a queue nobody is draining any more
+        done, _ = await asyncio.wait([feeding, *parsers], return_when=asyncio.FIRST_COMPLETED)
+        for task in (feeding, *parsers):
+            task.cancel()
+        await asyncio.gather(feeding, *parsers, return_exceptions=True)
+        for task in done:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+    return done_order
+
+
+def run_pipeline(urls, analyze, on_result=None, fetchers=DEFAULT_FETCHERS, workers=None,
+                 queue_size=DEFAULT_QUEUE, ordered=True, timeout=10, verify=True, cache=False,
+                 with_response=False):
+    """
+    Fetch URLs concurrently and analyse the raw pages in a process pool.
+
+    analyze(url, content_bytes, encoding) must be a picklable top-level function
+    (see html_analysis.py) returning a dict; it is merged with the page's status
+    and content_length. With with_response=True it is also given the response's
+    status= and headers= (a plain dict), e.g. for header and status signatures.
+    Fetched pages wait in a bounded queue, so downloads pause when every parser
+    is busy. Returns [(url, result), ...] in input order, or in completion order
+    with ordered=False; on_result(url, result) is called as each result is
+    released; if it raises, the run stops and the exception propagates.
+    cache=True fetches through http_cache.
+    """
+    workers = workers or os.cpu_count() or 1
+    return asyncio.run(_pipeline(urls, analyze, on_result, fetchers, workers, queue_size,
+                                 ordered, timeout, verify, cache, with_response))
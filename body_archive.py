@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# body_archive.py - Content-addressed, compressed store for response bodies and header blocks
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+# Next to the scripts like results.db, so the refs stored there resolve from any working directory
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".body_archive")
+LEVEL = 9
+ZDICT_SIZE = 32 * 1024   # zlib only looks back this far, so longer dictionaries are wasted
+DELTA_BLOCK = 16 * 1024  # bytes of a delta-compressed object sharing one window of its base
+ANCHOR = 32              # bytes searched for in the base to follow insertions and deletions
+MAX_CHAIN = 8            # deltas against deltas allowed before an object is stored on its own
+BLOCK_HEADER = struct.Struct(">III")   # window start, window end, compressed length
+
+# Boilerplate seen in almost every response, primed into the shared dictionary
+# so even the first copy of a small body or header block compresses well
+DEFAULT_ZDICT = b"".join([
+    b'{"Content-Type": "text/html; charset=UTF-8", "Content-Length": "", "Connection": "keep-alive", ',
+    b'"Cache-Control": "max-age=0, no-cache, no-store, must-revalidate", "Content-Encoding": "gzip", ',
+    b'"Date": "", "Server": "", "Vary": "Accept-Encoding", "Last-Modified": "", "ETag": "", ',
+    b'"Strict-Transport-Security": "max-age=31536000; includeSubDomains", "X-Frame-Options": "SAMEORIGIN", ',
+    b'"X-Content-Type-Options": "nosniff", "Set-Cookie": "; path=/; HttpOnly; Secure; SameSite=Lax", ',
+    b'"Accept-Ranges": "bytes", "Expires": "", "Age": "", "Via": "", "CF-Ray": "", "CF-Cache-Status": ""}',
+    b'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n',
+    b'<meta name="viewport" content="width=device-width, initial-scale=1">\n<title></title>\n',
+    b'<link rel="stylesheet" type="text/css" href=""><script type="text/javascript" src=""></script>\n',
+    b'</head>\n<body>\n<div class=""><a href=""></a></div><p></p><form method="post" action="">',
+    b'<input type="hidden" name="" value=""></form>\n</body>\n</html>\n',
+])
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _header_bytes(headers):
+    """Canonical serialisation of a header block, so equal blocks share one object."""
+    return json.dumps({str(k): str(v) for k, v in sorted(dict(headers).items())},
+                      separators=(",", ":")).encode()
+
+
+class BodyArchive:
+    """
+    Bodies and header blocks stored once each under their SHA-256.
+
+    Every object is zlib-compressed with the shared DEFAULT_ZDICT as preset
+    dictionary, unless put() is given a related object's digest (typically the
+    baseline response a variation is compared with). The object is then
+    stored as a delta: each DELTA_BLOCK of it is compressed with the window
+    of the base around the same position as dictionary, the position being
+    re-synchronised on every block so inserted or removed content does not
+    throw the rest of the body out of reach. A near-identical body of any
+    size then costs little more than its differences, and a byte-identical
+    one costs nothing because it has the same digest.
+
+    Each file starts with a "<base digest or -> <original length>" line, so
+    get() knows which objects to decode first and stats() needs no decoding.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+
+    def _path(self, key):
+        return self.root / key[:2] / key
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def put(self, data, base=None, key=None):
+        """
+        Store bytes (if new) and return their digest; base is an archived digest to delta against.
+
+        key is the data's SHA-256 when the caller has already computed it.
+        """
+        key = key or digest(data)
+        if key not in self:
+            self._write(key, self._compress(data, base if base != key else None))
+        return key
+
+    def rebase(self, key, base):
+        """
+        Recompress an archived object against base if that makes it smaller.
+
+        For objects archived before their baseline was known, e.g. by
+        concurrent probes. Returns True if the object was rewritten.
+        """
+        if key == base or base not in self or key in self._chain(base):
+            return False
+        blob = self._compress(self.get(key), base)
+        if len(blob) >= self._path(key).stat().st_size:
+            return False
+        self._write(key, blob)
+        return True
+
+    def _header(self, key):
+        """(base digest or None, original length) from an object's first line."""
+        with open(self._path(key), "rb") as fh:
+            ref, length = fh.readline().split()
+        return (None if ref == b"-" else ref.decode()), int(length)
+
+    def _chain(self, key):
+        """Digests an object's dictionary depends on (its base, that base's base, ...)."""
+        chain = []
+        while True:
+            key, _ = self._header(key)
+            if key is None:
+                return chain
+            chain.append(key)
+
+    def _compress(self, data, base=None):
+        if not base or base not in self or len(self._chain(base)) >= MAX_CHAIN:
+            compressor = zlib.compressobj(LEVEL, zdict=DEFAULT_ZDICT)
+            return b"- %d\n" % len(data) + compressor.compress(data) + compressor.flush()
+        source = self.get(base)
+        blocks = [b"%s %d\n" % (base.encode(), len(data))]
+        shift = 0
+        for offset in range(0, len(data), DELTA_BLOCK):
+            block = data[offset:offset + DELTA_BLOCK]
+            # Where this block's start sits in the base, searched near the previous match
+            near = offset + shift
+            found = source.find(block[:ANCHOR], max(0, near - ZDICT_SIZE), near + ZDICT_SIZE + ANCHOR)
+            if found >= 0:
+                shift = found - offset
+            # The window ends a block past that point, so the whole block stays within reach
+            center = max(0, min(offset + shift, len(source)))
+            start, end = max(0, center - (ZDICT_SIZE - DELTA_BLOCK)), min(len(source), center + DELTA_BLOCK)
+            if start >= end:
+                start = end = 0
+            compressor = zlib.compressobj(LEVEL, zdict=source[start:end] or DEFAULT_ZDICT)
+            payload = compressor.compress(block) + compressor.flush()
+            blocks += [BLOCK_HEADER.pack(start, end, len(payload)), payload]
+        return b"".join(blocks)
+
+    @staticmethod
+    def _decompress(payload, source):
+        if source is None:
+            return zlib.decompressobj(zdict=DEFAULT_ZDICT).decompress(payload)
+        parts = []
+        pos = 0
+        while pos < len(payload):
+            start, end, size = BLOCK_HEADER.unpack_from(payload, pos)
+            pos += BLOCK_HEADER.size
+            zdict = source[start:end] or DEFAULT_ZDICT
+            parts.append(zlib.decompressobj(zdict=zdict).decompress(payload[pos:pos + size]))
+            pos += size
+        return b"".join(parts)
+
+    def _write(self, key, blob):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        """The original bytes stored under key."""
+        # Decode the chain from its self-contained end back to key, one object at a time
+        data = None
+        for k in [*reversed(self._chain(key)), key]:
+            with open(self._path(k), "rb") as fh:
+                payload = fh.read().partition(b"\n")[2]
+            data = self._decompress(payload, data)
+            if digest(data) != k:
+                raise ValueError(f"archived object {k} is corrupt")
+        return data
+
+    def put_headers(self, headers):
+        return self.put(_header_bytes(headers))
+
+    def get_headers(self, key):
+        return json.loads(self.get(key))
+
+    def stats(self):
+        """Object count, original bytes and bytes on disk (read from the files, nothing is decoded)."""
+        objects = stored = original = 0
+        for path in self.root.glob("??/*"):
+            if path.name.endswith(".tmp"):
+                continue
+            objects += 1
+            stored += path.stat().st_size
+            original += self._header(path.name)[1]
+        return {"objects": objects, "original_bytes": original, "stored_bytes": stored}
+
+
+if __name__ == "__main__":
+    # python body_archive.py stats | cat <digest> | diff <digest> <digest>
+    archive = BodyArchive()
+    if len(sys.argv) >= 2 and sys.argv[1] == "stats":
+        s = archive.stats()
+        ratio = s["stored_bytes"] / s["original_bytes"] if s["original_bytes"] else 0
+        print(f"{s['objects']} objects, {s['original_bytes']} bytes stored in {s['stored_bytes']} "
+              f"({ratio:.1%})")
+    elif len(sys.argv) == 3 and sys.argv[1] == "cat":
+        sys.stdout.buffer.write(archive.get(sys.argv[2]))
+    elif len(sys.argv) == 4 and sys.argv[1] == "diff":
+        import difflib
+        a, b = (archive.get(k).decode("utf-8", "replace").splitlines() for k in sys.argv[2:4])
+        sys.stdout.writelines(line + "\n" for line in difflib.unified_diff(a, b, sys.argv[2][:12], sys.argv[3][:12],
+                                                                             lineterm=""))
+    else:
+        print("Usage: python body_archive.py stats | cat <digest> | diff <digest> <digest>")
+        sys.exit(1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# corpus_scan.py - Keyword counts over directories/globs of saved HTML pages
+
+import glob
+import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
+
+from html_analysis import keyword_counts, page_text
+from keyword_matcher import KeywordMatcher
+
+HTML_SUFFIXES = (".html", ".htm")
+CHUNK_SIZE = 64        # files per worker task
+MAX_PENDING = 4        # chunks in flight per worker before we stop submitting
+
+# <script>/<style> elements, skipped by the raw scan when asked to
+SKIP_ELEMENTS = re.compile(rb"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def iter_corpus(sources, suffixes=HTML_SUFFIXES):
+    """
+    Yield file paths from files, directories (walked recursively) and glob patterns.
+
+    Paths are produced lazily, so a corpus of millions of pages is never listed
+    in memory at once.
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(suffixes):
+                        yield os.path.join(root, name)
+        elif os.path.isfile(source):
+            yield source
+        else:
+            for path in glob.iglob(source, recursive=True):
+                if os.path.isfile(path):
+                    yield path
+
+
+def scan_file(path, keywords, whole_word=False):
+    """
+    Keyword counts in one saved page's visible text, in the keyword_compare_local result shape.
+
+    The page has to be parsed whole; its bytes go to the parser undecoded so
+    the encoding is taken from the page rather than guessed as UTF-8.
+    """
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        text = page_text(content)
+        return {
+            "path": path,
+            "type": "local_file",
+            "content_length": len(content),
+            "text_length": len(text),
+            "keyword_counts": keyword_counts(text, keywords, whole_word),
+        }
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+
+@lru_cache(maxsize=32)
+def _byte_matcher(keywords, whole_word):
+    return KeywordMatcher(keywords, whole_word=whole_word, ignore_case=True, binary=True)
+
+
+def raw_keyword_counts(buf, keywords, whole_word=False, skip_scripts=False):
+    """
+    Case-insensitive keyword counts straight from HTML bytes (or an mmap).
+
+    Nothing is decoded or parsed, so markup counts too: keywords in tags,
+    attributes and comments are hits. skip_scripts=True leaves out the bodies
+    of <script> and <style> elements.
+    """
+    matcher = _byte_matcher(tuple(keywords), whole_word)
+    counts = dict.fromkeys(matcher.keywords, 0)
+    spans = [(0, len(buf))]
+    if skip_scripts:
+        spans, start = [], 0
+        for m in SKIP_ELEMENTS.finditer(buf):
+            spans.append((start, m.start()))
+            start = m.end()
+        spans.append((start, len(buf)))
+    for start, end in spans:
+        for _, kw in matcher.finditer(buf, start, end):
+            counts[kw] += 1
+    return counts
+
+
+def scan_file_raw(path, keywords, whole_word=False, skip_scripts=False):
+    """scan_file's fast path: memory-map the file and count keyword bytes without decoding."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                counts = raw_keyword_counts(b"", keywords, whole_word)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    counts = raw_keyword_counts(buf, keywords, whole_word, skip_scripts)
+        return {
+            "path": path,
+            "type": "local_file",
+            "content_length": size,
+            "keyword_counts": counts,
+        }
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+
+def scan_chunk(paths, keywords, whole_word=False, raw=False, skip_scripts=False):
+    """Worker task: scan a batch of files (batched to keep pickling overhead low)."""
+    if raw:
+        return [scan_file_raw(path, keywords, whole_word, skip_scripts) for path in paths]
+    return [scan_file(path, keywords, whole_word) for path in paths]
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def scan_corpus(sources, keywords, out_file, whole_word=False, workers=None,
+                chunk_size=CHUNK_SIZE, on_result=None, raw=False, skip_scripts=False):
+    """
+    Scan every page under sources in a process pool.
+
+    Files are submitted in chunks with a bounded number of chunks in flight;
+    each file's result is appended to out_file as one JSON line as soon as its
+    chunk finishes, so memory stays flat regardless of corpus size. Returns
+    the merged summary: file/error/byte totals, total occurrences per keyword
+    and how many files contain each keyword. Each page is parsed and only its
+    visible text is counted (scan_file), as in the single-file and remote
+    paths; raw=True counts with the mmap byte scan instead (scan_file_raw),
+    which never reads a file into memory whole but counts markup too.
+    """
+    keywords = tuple(keywords)
+    workers = workers or os.cpu_count() or 1
+    summary = {
+        "files": 0,
+        "errors": 0,
+        "bytes": 0,
+        "keyword_totals": dict.fromkeys(keywords, 0),
+        "files_with_keyword": dict.fromkeys(keywords, 0),
+    }
+
+    def merge(results, out):
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+            summary["files"] += 1
+            if "error" in result:
+                summary["errors"] += 1
+            else:
+                summary["bytes"] += result["content_length"]
+                for kw, count in result["keyword_counts"].items():
+                    summary["keyword_totals"][kw] += count
+                    summary["files_with_keyword"][kw] += bool(count)
+            if on_result:
+                on_result(result)
+
+    with open(out_file, "w") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in _chunks(iter_corpus(sources), chunk_size):
+            if len(pending) >= workers * MAX_PENDING:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result(), out)
+            pending.add(pool.submit(scan_chunk, chunk, keywords, whole_word, raw, skip_scripts))
+        for future in wait(pending).done:
+            merge(future.result(), out)
+    return summary
+
+
+def print_summary(summary):
+    print(f"Files scanned: {summary['files']} ({summary['errors']} errors, {summary['bytes']} bytes)")
+    print(f"\n{'Keyword':<15}{'Occurrences':>12}{'Files':>10}")
+    print("-" * 37)
+    for kw, total in summary["keyword_totals"].items():
+        print(f"{kw:<15}{total:>12}{summary['files_with_keyword'][kw]:>10}")
+
+
+if __name__ == "__main__":
+    # python corpus_scan.py [--out results.ndjson] [--whole-word] [--raw [--skip-scripts]] <dir|glob|file> [...] -- kw1 kw2 ...
+    args = sys.argv[1:]
+    whole_word = "--whole-word" in args
+    raw = "--raw" in args
+    skip_scripts = "--skip-scripts" in args
+    args = [a for a in args if a not in ("--whole-word", "--raw", "--skip-scripts")]
+    out_file = "corpus_results.ndjson"
+    if "--out" in args:
+        i = args.index("--out")
+        out_file = args[i + 1]
+        del args[i:i + 2]
+    keywords = ["admin", "login", "debug", "error"]
+    if "--" in args:
+        i = args.index("--")
+        args, keywords = args[:i], args[i + 1:]
+    if not args:
+        print("Usage: python corpus_scan.py [--out file.ndjson] [--whole-word] [--raw [--skip-scripts]] "
+              "<dir|glob|file> [...] [-- keywords]")
+        sys.exit(1)
+    print(f"Keywords: {keywords}")
+    print_summary(scan_corpus(args, keywords, out_file, whole_word, raw=raw, skip_scripts=skip_scripts))
+    print(f"\n✓ Per-file results saved to: {out_file}")
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# crawler.py - Bounded same-scope crawler feeding the page analyzers
+
+import hashlib
+import json
+import math
+import sys
+import threading
+import urllib.parse
+import urllib.robotparser
+
+import http_clients
+from form_index import FormIndex, print_report
+from page_analyzer import Page, run_extractors
+from probe_engine import run_probes
+from rate_limit import HostRateLimiter
+
+USER_AGENT = "Lab4.1-crawler/1.0"
+MAX_DEPTH = 2
+MAX_PAGES = 200
+MAX_BYTES = 50 * 1024 * 1024        # total body bytes downloaded across the crawl
+MAX_PAGE_BYTES = 2 * 1024 * 1024    # bytes read from any single page
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with a tunable false-positive rate.
+
+    Memory is sized once from the expected capacity (about 1.8 MB for a
+    million URLs at 0.1%), so the seen-URL set never grows with the crawl. A
+    false positive only means a URL is skipped, never fetched twice.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8", "replace"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add item; returns False if it was (probably) already present."""
+        new = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        return new
+
+    def __contains__(self, item):
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+
+def normalize_url(base, link):
+    """Absolute http(s) URL for a link with the fragment dropped, or None."""
+    url, _ = urllib.parse.urldefrag(urllib.parse.urljoin(base, link.strip()))
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def extract_links(url, soup):
+    """Links a page points at: <a>/<area>/<frame>/<iframe> targets and GET form actions."""
+    base = soup.find("base", href=True)
+    base_url = urllib.parse.urljoin(url, base["href"]) if base else url
+    links = []
+    for tag, attr in (("a", "href"), ("area", "href"), ("frame", "src"), ("iframe", "src"), ("form", "action")):
+        for el in soup.find_all(tag):
+            value = el.get(attr)
+            if tag == "form":
+                # Submitting POST forms is not crawling; a GET form's action is an ordinary page
+                if el.get("method", "GET").upper() != "GET":
+                    continue
+                value = value or ""
+            if value is not None:
+                link = normalize_url(base_url, value)
+                if link:
+                    links.append(link)
+    return list(dict.fromkeys(links))
+
+
+class Crawler:
+    """
+    Breadth-first crawl of the seeds' hosts.
+
+    Each depth level is fetched through the probe engine (global and per-host
+    caps plus a HostRateLimiter for politeness); every HTML page is parsed once
+    and run through the page_analyzer extractors (forms, keywords, WAF), so
+    results feed the same analyzers as single-page fetches. URLs are
+    de-duplicated with a Bloom filter, and the crawl stops at max_depth,
+    max_pages or max_bytes, whichever comes first. robots.txt (including
+    Crawl-delay) is honoured per host. Redirects are not followed blindly:
+    each Location is checked like a link (scope, robots.txt, seen) and
+    fetched at the same depth. With a form_index.FormIndex, pages
+    carry form_ids and each distinct form is kept once in the index.
+    """
+
+    def __init__(self, seeds, max_depth=MAX_DEPTH, max_pages=MAX_PAGES, max_bytes=MAX_BYTES,
+                 max_page_bytes=MAX_PAGE_BYTES, extractors=None, keywords=None, per_host=2,
+                 concurrency=16, timeout=10, verify=True, respect_robots=True, limiter=None,
+                 on_page=None, form_index=None):
+        self.seeds = [u for u in (normalize_url(s, "") for s in seeds) if u]
+        self.scope = {urllib.parse.urlsplit(u).netloc for u in self.seeds}
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_page_bytes = max_page_bytes
+        self.extractors = extractors
+        self.options = {"keywords": keywords} if keywords else {}
+        self.per_host = per_host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.verify = verify
+        self.respect_robots = respect_robots
+        self.limiter = limiter or HostRateLimiter(rate=2, burst=2, max_rate=10)
+        self.on_page = on_page
+        self.form_index = form_index
+        self.seen = BloomFilter(capacity=max(1000, max_pages * 50))
+        self.robots = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def in_scope(self, url):
+        return urllib.parse.urlsplit(url).netloc in self.scope
+
+    def _robots(self, url):
+        parts = urllib.parse.urlsplit(url)
+        host = parts.netloc
+        if host not in self.robots:
+            parser = urllib.robotparser.RobotFileParser()
+            try:
+                r = http_clients.get(f"{parts.scheme}://{host}/robots.txt", timeout=self.timeout,
+                                     verify=self.verify, headers={"User-Agent": USER_AGENT})
+                if r.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif r.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(r.text.splitlines())
+            except Exception:
+                parser.allow_all = True
+            delay = parser.crawl_delay(USER_AGENT)
+            if delay:
+                self.limiter.limit(host, 1 / float(delay))
+            self.robots[host] = parser
+        return self.robots[host]
+
+    def allowed(self, url):
+        return not self.respect_robots or self._robots(url).can_fetch(USER_AGENT, url)
+
+    def _read(self, r):
+        """Read up to max_page_bytes (and what is left of max_bytes) of a streamed body."""
+        chunks, length, truncated = [], 0, False
+        for chunk in r.iter_content(64 * 1024):
+            with self._lock:
+                budget = min(self.max_page_bytes - length, self.max_bytes - self.bytes)
+                if len(chunk) > budget:
+                    chunk, truncated = chunk[:max(budget, 0)], True
+                self.bytes += len(chunk)
+            chunks.append(chunk)
+            length += len(chunk)
+            if truncated:
+                break
+        return b"".join(chunks), truncated
+
+    def _handle(self, job, r):
+        url, _, depth = job
+        content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        result = {"url": url, "depth": depth, "status": r.status_code, "content_type": content_type}
+        if r.is_redirect:
+            result["redirect"] = normalize_url(url, r.headers["Location"])
+            return result
+        if content_type not in HTML_TYPES:
+            return result
+        content, truncated = self._read(r)
+        page = Page(r.url, content, r.encoding, r.status_code, r.headers, **self.options)
+        result.update({"length": len(content), "truncated": truncated})
+        result.update(run_extractors(page, self.extractors))
+        if self.form_index is not None and "forms" in result:
+            with self._lock:
+                result["form_ids"] = self.form_index.add_page({"url": url, "forms": result.pop("forms")})
+        result["links"] = extract_links(r.url, page.soup)
+        return result
+
+    def _error(self, job, e):
+        url, _, depth = job
+        return {"url": url, "depth": depth, "error": str(e)}
+
+    def crawl(self):
+        """Run the crawl; returns one result dict per fetched URL, in crawl order."""
+        results = []
+        queued = 0
+
+        def enqueue(url):
+            # Only queue (and count) fetchable URLs the page budget can still reach;
+            # the rest is never stored
+            nonlocal queued
+            if url and queued < self.max_pages and self.in_scope(url) and self.allowed(url) \
+                    and self.seen.add(url):
+                queued += 1
+                return True
+            return False
+
+        level = [url for url in self.seeds if enqueue(url)]
+        next_level = []
+        depth = 0
+        while (level or next_level) and len(results) < self.max_pages and self.bytes < self.max_bytes:
+            if not level:
+                level, next_level, depth = next_level, [], depth + 1
+            jobs = [(url, {"User-Agent": USER_AGENT}, depth) for url in level[:self.max_pages - len(results)]]
+            level = []
+            for result in run_probes(jobs, self._handle, self._error, concurrency=self.concurrency,
+                                     per_host=self.per_host, timeout=self.timeout, verify=self.verify,
+                                     stream=True, limiter=self.limiter, retries=1, allow_redirects=False):
+                results.append(result)
+                if self.on_page:
+                    self.on_page(result)
+                if "redirect" in result:
+                    # A redirect target is fetched at the same depth as the page that redirected
+                    if enqueue(result["redirect"]):
+                        level.append(result["redirect"])
+                    continue
+                if depth >= self.max_depth:
+                    continue
+                for link in result.get("links", ()):
+                    if enqueue(link):
+                        next_level.append(link)
+        return results
+
+
+def crawl(seeds, out_file=None, **options):
+    """Crawl seeds with a Crawler(**options); optionally save the results as JSON."""
+    results = Crawler(seeds, **options).crawl()
+    if out_file:
+        with open(out_file, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    # python crawler.py <seed> [...] [--depth N] [--pages N] [--out crawl.json] [--ignore-robots]
+    args = sys.argv[1:]
+    options = {}
+    out_file = "crawl_results.json"
+    forms_file = "crawl_forms.json"
+    for flag, key in (("--depth", "max_depth"), ("--pages", "max_pages")):
+        if flag in args:
+            i = args.index(flag)
+            options[key] = int(args[i + 1])
+            del args[i:i + 2]
+    if "--out" in args:
+        i = args.index("--out")
+        out_file = args[i + 1]
+        del args[i:i + 2]
+    if "--ignore-robots" in args:
+        options["respect_robots"] = False
+        args.remove("--ignore-robots")
+    if not args:
+        print("Usage: python crawler.py <seed_url> [...] [--depth N] [--pages N] [--out file.json] [--ignore-robots]")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"CRAWLING {', '.join(args)}")
+    print("=" * 70)
+
+    def show(result):
+        if "error" in result:
+            print(f"  ❌ [{result['depth']}] {result['url']}: {result['error']}")
+        elif "redirect" in result:
+            print(f"  ↪️  [{result['depth']}] {result['status']} {result['url']} -> {result['redirect']}")
+        else:
+            forms = len(result.get("form_ids", []))
+            print(f"  ✓ [{result['depth']}] {result['status']} {result['url']} "
+                  f"({len(result.get('links', []))} links, {forms} forms)")
+
+    index = FormIndex()
+    results = crawl(args, out_file=out_file, on_page=show, form_index=index, **options)
+    index.save(forms_file)
+    print()
+    print_report(index, sum(len(r.get("form_ids", [])) for r in results))
+    print(f"\n✓ {len(results)} pages; results saved to: {out_file}, unique forms to: {forms_file}")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# fingerprint.py - Stable body digests and near-duplicate sketches
+
+import hashlib
+import heapq
+import re
+from collections import deque
+
+SKETCH_SIZE = 64          # hashes kept in the bottom-k MinHash sketch
+SHINGLE_SIZE = 3          # words per shingle
+NEAR_DUPLICATE = 0.8      # estimated Jaccard similarity treated as near-identical
+
+IDENTICAL = "identical"
+NEAR_IDENTICAL = "near-identical (dynamic tokens)"
+DIFFERENT = "structurally different"
+
+_TOKEN = re.compile(rb"[a-z0-9]+")
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class Fingerprinter:
+    """
+    Incremental fingerprint of a body fed in chunks.
+
+    Keeps a SHA-256 digest of the raw bytes and a bottom-k MinHash sketch of
+    word shingles, so two bodies can be compared later without keeping either.
+    """
+
+    def __init__(self, sketch_size=SKETCH_SIZE, shingle_size=SHINGLE_SIZE):
+        self.sketch_size = sketch_size
+        self._digest = hashlib.sha256()
+        self._window = deque(maxlen=shingle_size)
+        self._partial = b""
+        self._heap = []     # negated hashes: the largest kept hash sits on top
+        self._kept = set()
+
+    def _add_token(self, token):
+        self._window.append(token)
+        if len(self._window) == self._window.maxlen:
+            self._keep(_hash64(b" ".join(self._window)))
+
+    def _keep(self, h):
+        if h in self._kept:
+            return
+        if len(self._heap) < self.sketch_size:
+            heapq.heappush(self._heap, -h)
+            self._kept.add(h)
+        elif h < -self._heap[0]:
+            self._kept.discard(-heapq.heapreplace(self._heap, -h))
+            self._kept.add(h)
+
+    def update(self, chunk):
+        self._digest.update(chunk)
+        data = self._partial + chunk.lower()
+        tokens = _TOKEN.findall(data)
+        # A token touching the end of the chunk may continue in the next one
+        if tokens and data[-1:].isalnum():
+            self._partial = tokens.pop()
+        else:
+            self._partial = b""
+        for token in tokens:
+            self._add_token(token)
+
+    def result(self):
+        if self._partial:
+            self._add_token(self._partial)
+            self._partial = b""
+        # Bodies shorter than one shingle still get a sketch of their words
+        if not self._heap and self._window:
+            self._keep(_hash64(b" ".join(self._window)))
+        return {
+            "digest": self._digest.hexdigest(),
+            "sketch": "".join(f"{h:016x}" for h in sorted(self._kept)),
+        }
+
+
+def fingerprint(data, sketch_size=SKETCH_SIZE, shingle_size=SHINGLE_SIZE):
+    """Fingerprint a complete body (bytes or str)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8", "replace")
+    fp = Fingerprinter(sketch_size, shingle_size)
+    fp.update(data)
+    return fp.result()
+
+
+def _sketch_hashes(sketch):
+    return {int(sketch[i:i + 16], 16) for i in range(0, len(sketch), 16)}
+
+
+def similarity(fp_a, fp_b, sketch_size=SKETCH_SIZE):
+    """Estimated Jaccard similarity of two fingerprints' word shingles (0.0 - 1.0)."""
+    if fp_a["digest"] == fp_b["digest"]:
+        return 1.0
+    a, b = _sketch_hashes(fp_a["sketch"]), _sketch_hashes(fp_b["sketch"])
+    if not a and not b:
+        return 1.0
+    # Bottom-k estimate: share of the k smallest hashes of the union found in both
+    union = sorted(a | b)[:sketch_size]
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+def compare(fp_a, fp_b, threshold=NEAR_DUPLICATE):
+    """Classify two fingerprints as identical, near-identical or structurally different."""
+    if fp_a["digest"] == fp_b["digest"]:
+        return IDENTICAL
+    if similarity(fp_a, fp_b) >= threshold:
+        return NEAR_IDENTICAL
+    return DIFFERENT
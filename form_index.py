@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# form_index.py - Deduplicate forms across pages by canonical signature
+
+import hashlib
+import json
+import sys
+import urllib.parse
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_action(action):
+    """
+    Form action with the parts that don't change the endpoint normalised away.
+
+    Scheme and host are lowercased, default ports and fragments dropped and
+    query parameters sorted by name (values are kept: ?page=login and
+    ?page=search are different endpoints).
+    """
+    parts = urllib.parse.urlsplit(action or "")
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def form_signature(form):
+    """Canonical (method, action, sorted (name, type) inputs) of an extract_page form."""
+    inputs = sorted({(inp.get("name") or "", (inp.get("type") or "text").lower())
+                     for inp in form.get("inputs", [])})
+    return {
+        "method": (form.get("method") or "GET").upper(),
+        "action": normalize_action(form.get("action")),
+        "inputs": [{"name": name, "type": type_} for name, type_ in inputs],
+    }
+
+
+def signature_id(signature):
+    """Short stable id of a signature."""
+    data = json.dumps(signature, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+class FormIndex:
+    """
+    Unique forms across any number of pages.
+
+    Each form is stored once under its signature id with the pages it was
+    seen on, so the index (and anything analysing it) grows with the number
+    of distinct forms rather than with pages crawled.
+    """
+
+    def __init__(self):
+        self.forms = {}
+        self._seen_pages = {}   # signature id -> set of the pages in its ordered "pages" list
+
+    def add(self, page_url, form):
+        """Index one form seen on page_url; returns its signature id."""
+        signature = form_signature(form)
+        sid = signature_id(signature)
+        entry = self.forms.get(sid)
+        if entry is None:
+            entry = self.forms[sid] = {"id": sid, **signature, "pages": []}
+            self._seen_pages[sid] = set()
+        if page_url not in self._seen_pages[sid]:
+            self._seen_pages[sid].add(page_url)
+            entry["pages"].append(page_url)
+        return sid
+
+    def add_page(self, result):
+        """Index every form of an extract_page/crawler result; returns their signature ids."""
+        return [self.add(result.get("url"), form) for form in result.get("forms", [])]
+
+    def report(self):
+        """Unique forms, most widespread first."""
+        return sorted(self.forms.values(), key=lambda f: (-len(f["pages"]), f["action"], f["method"]))
+
+    def save(self, path):
+        with open(path, "w") as fh:
+            json.dump(self.report(), fh, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path) as fh:
+            for entry in json.load(fh):
+                index.forms[entry["id"]] = entry
+                index._seen_pages[entry["id"]] = set(entry["pages"])
+        return index
+
+
+def print_report(index, seen):
+    """Summary of unique forms against the number of form occurrences indexed."""
+    unique = index.report()
+    print(f"{seen} forms on pages, {len(unique)} unique")
+    for entry in unique:
+        names = ", ".join(inp["name"] or f"<{inp['type']}>" for inp in entry["inputs"]) or "no inputs"
+        print(f"  [{entry['id']}] {entry['method']:6} {entry['action']}")
+        print(f"      inputs: {names}")
+        print(f"      on {len(entry['pages'])} page(s), e.g. {entry['pages'][0]}")
+
+
+if __name__ == "__main__":
+    # python form_index.py results.json [...] [--out forms_index.json]
+    # accepts parse_page output (one page), parse_pages or crawler output (a list of pages)
+    args = sys.argv[1:]
+    out_file = "forms_index.json"
+    if "--out" in args:
+        i = args.index("--out")
+        out_file = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print("Usage: python form_index.py <results.json> [...] [--out forms_index.json]")
+        sys.exit(1)
+    index = FormIndex()
+    seen = 0
+    for path in args:
+        with open(path) as fh:
+            data = json.load(fh)
+        for page in data if isinstance(data, list) else [data]:
+            seen += len(index.add_page(page))
+    print_report(index, seen)
+    index.save(out_file)
+    print(f"\n✓ Unique forms saved to: {out_file}")
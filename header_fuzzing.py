@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 # header_fuzzing.py - Fuzz different header combinations and log response changes
 
-import requests
-import json
+import os
+import sys
 from tabulate import tabulate
 from collections import defaultdict
 
+from body_archive import BodyArchive
+from fingerprint import compare, IDENTICAL
+from probe_engine import run_probes
+from response_stream import read_body
+from result_sink import ResultSink, iter_records, segments, to_json
+from result_store import save_run
+
 # Test sites
 sites = [
     "http://example.com",
@@ -53,161 +60,255 @@ header_variations = {
     },
 }
 
-print("=" * 120)
-print("HEADER FUZZING - Testing Response Changes")
-print("=" * 120)
+def build_response_data(job, r):
+    site, headers, variation_name = job
+    body = read_body(r, indicators=(), fingerprint=True, archive=archive)
+    return {
+        "variation": variation_name,
+        "status": r.status_code,
+        "content_length": body["length"],
+        "truncated": body["truncated"],
+        "server": r.headers.get("Server"),
+        "headers_ref": archive.put_headers(r.headers),   # full blocks live in the archive
+        "body_ref": body["body_ref"],
+        "body_hash": body["sha256"],  # Stable across runs and machines
+        "body_sketch": body["fingerprint"]["sketch"],
+    }
 
-all_results = {}
+# Bodies and response header blocks are kept once each in the content-addressed archive
+archive = BodyArchive()
+
+def body_fingerprint(response_data):
+    return {"digest": response_data["body_hash"], "sketch": response_data["body_sketch"]}
+
+def build_error(job, e):
+    site, headers, variation_name = job
+    return {"variation": variation_name, "error": str(e)}
+
+def nest_results(records):
+    """{site: {variation: response_data}} from the log, with body similarity to each baseline."""
+    nested = {}
+    for record in records:
+        record = dict(record)
+        nested.setdefault(record.pop("site"), {})[record["variation"]] = record
+    for variations in nested.values():
+        baseline = variations.get("baseline")
+        if not baseline or "error" in baseline:
+            continue
+        for name, data in variations.items():
+            if name != "baseline" and "error" not in data:
+                data["body_similarity"] = compare(body_fingerprint(baseline), body_fingerprint(data))
+    return nested
+
+# Every response is appended to the log as soon as it arrives; --resume keeps
+# the completed ones from an interrupted run and only probes what is missing
+output_log = "/workspaces/Lab-4.1/header_fuzzing_results.ndjson"
+
+def logged(sink):
+    """run_probes on_result callback writing each result to sink as it arrives."""
+    def write(job, result):
+        sink.write({"site": job[0], **result})
+    return write
+
+def main(argv=None):
+    """Probe every site x header variation, print what changed and save the results."""
+    args = sys.argv[1:] if argv is None else argv
+    resume = "--resume" in args
+    if not resume:
+        for segment in segments(output_log):
+            os.remove(segment)
+    completed = {(r["site"], r["variation"]): r for r in iter_records(output_log) if "error" not in r}
+    sink = ResultSink(output_log)
+
+    print("=" * 120)
+    print("HEADER FUZZING - Testing Response Changes")
+    print("=" * 120)
+
+    all_results = {}
+
+    # Send every site x variation request concurrently, then compare per site
+    jobs = [(site, headers, name) for site in sites for name, headers in header_variations.items()]
+    pending = [job for job in jobs if (job[0], job[2]) not in completed]
+    if resume:
+        print(f"\nResuming: {len(jobs) - len(pending)} of {len(jobs)} probes already completed")
+    fetched = dict(zip(((site, name) for site, _, name in pending),
+                       run_probes(pending, build_response_data, build_error, stream=True,
+                                  on_result=logged(sink))))
+    sink.close()
+    responses = {}
+    for site, _, name in jobs:
+        response_data = completed.get((site, name)) or fetched[(site, name)]
+        response_data = {k: v for k, v in response_data.items() if k != "site"}
+        responses.setdefault(site, {})[name] = response_data
+
+    # Store each variation body as a delta against its site's baseline body
+    for variations in responses.values():
+        base_ref = variations.get("baseline", {}).get("body_ref")
+        for name, response_data in variations.items():
+            if base_ref and response_data.get("body_ref"):
+                archive.rebase(response_data["body_ref"], base_ref)
+
+    for site in sites:
+        print(f"\n{'='*120}")
+        print(f"Target: {site}")
+        print(f"{'='*120}\n")
+
+        baseline_response = None
+        site_results = []
+
+        for variation_name, response_data in responses.get(site, {}).items():
+            if "error" in response_data:
+                site_results.append({
+                    "Headers": variation_name,
+                    "Status": "ERROR",
+                    "Length": "---",
+                    "Changed": "ERROR",
+                    "Interesting": response_data["error"][:40],
+                })
+                continue
+
+            status = response_data["status"]
+            length = response_data["content_length"]
 
-for site in sites:
-    print(f"\n{'='*120}")
-    print(f"Target: {site}")
-    print(f"{'='*120}\n")
-    
-    baseline_response = None
-    site_results = []
-    
-    for variation_name, headers in header_variations.items():
-        try:
-            r = requests.get(site, headers=headers, timeout=5)
-            
-            response_data = {
-                "variation": variation_name,
-                "status": r.status_code,
-                "content_length": len(r.text),
-                "headers": dict(r.headers),
-                "body_hash": hash(r.text) % (10**8),  # Simple hash for comparison
-            }
-            
             # Store baseline
             if variation_name == "baseline":
                 baseline_response = response_data
                 site_results.append({
                     "Headers": variation_name,
-                    "Status": r.status_code,
-                    "Length": len(r.text),
+                    "Status": status,
+                    "Length": length,
                     "Changed": "BASELINE",
                     "Interesting": "---",
                 })
+            elif baseline_response is None:
+                site_results.append({
+                    "Headers": variation_name,
+                    "Status": status,
+                    "Length": length,
+                    "Changed": "",
+                    "Interesting": "(no baseline)",
+                })
             else:
                 # Compare to baseline
-                status_changed = baseline_response["status"] != r.status_code
-                length_changed = baseline_response["content_length"] != len(r.text)
-                
+                status_changed = baseline_response["status"] != status
+                length_changed = baseline_response["content_length"] != length
+                body_similarity = compare(body_fingerprint(baseline_response), body_fingerprint(response_data))
+                response_data["body_similarity"] = body_similarity
+                body_changed = body_similarity != IDENTICAL
+
                 change_indicator = ""
-                if status_changed or length_changed:
+                if status_changed or length_changed or body_changed:
                     change_indicator = "🔴 CHANGED"
-                    
+
                 interesting_notes = []
                 if status_changed:
-                    interesting_notes.append(f"Status: {baseline_response['status']}→{r.status_code}")
+                    interesting_notes.append(f"Status: {baseline_response['status']}→{status}")
                 if length_changed:
-                    interesting_notes.append(f"Length: {baseline_response['content_length']}→{len(r.text)}")
-                
+                    interesting_notes.append(f"Length: {baseline_response['content_length']}→{length}")
+                if body_changed:
+                    interesting_notes.append(f"Body: {body_similarity}")
+
                 site_results.append({
                     "Headers": variation_name,
-                    "Status": r.status_code,
-                    "Length": len(r.text),
+                    "Status": status,
+                    "Length": length,
                     "Changed": change_indicator,
                     "Interesting": "; ".join(interesting_notes) if interesting_notes else "---",
                 })
-            
+
             all_results.setdefault(site, {})[variation_name] = response_data
-            
-        except requests.exceptions.RequestException as e:
-            site_results.append({
-                "Headers": variation_name,
-                "Status": "ERROR",
-                "Length": "---",
-                "Changed": "ERROR",
-                "Interesting": str(e)[:40],
-            })
-    
-    print(tabulate(site_results, headers="keys", tablefmt="grid"))
 
-# Detailed analysis
-print(f"\n\n{'='*120}")
-print("DETAILED ANALYSIS - ANOMALIES & CHANGES")
-print(f"{'='*120}\n")
+        print(tabulate(site_results, headers="keys", tablefmt="grid"))
 
-for site, variations in all_results.items():
-    print(f"\n📍 {site}")
-    print("-" * 120)
-    
-    if "baseline" not in variations:
-        print("  (No baseline found)")
-        continue
-    
-    baseline = variations["baseline"]
-    changes_found = False
-    
-    for var_name, var_data in variations.items():
-        if var_name == "baseline":
+    # Detailed analysis
+    print(f"\n\n{'='*120}")
+    print("DETAILED ANALYSIS - ANOMALIES & CHANGES")
+    print(f"{'='*120}\n")
+
+    for site, variations in all_results.items():
+        print(f"\n📍 {site}")
+        print("-" * 120)
+
+        if "baseline" not in variations:
+            print("  (No baseline found)")
             continue
-        
-        if "error" in var_data:
-            print(f"  ❌ {var_name}: ERROR - {var_data['error']}")
-            changes_found = True
+
+        baseline = variations["baseline"]
+        changes_found = False
+
+        for var_name, var_data in variations.items():
+            if var_name == "baseline":
+                continue
+
+            if "error" in var_data:
+                print(f"  ❌ {var_name}: ERROR - {var_data['error']}")
+                changes_found = True
+                continue
+
+            status_diff = var_data["status"] != baseline["status"]
+            length_diff = var_data["content_length"] != baseline["content_length"]
+            body_diff = var_data.get("body_similarity", IDENTICAL) != IDENTICAL
+
+            if status_diff or length_diff or body_diff:
+                print(f"\n  🔴 {var_name.upper()}")
+                if status_diff:
+                    print(f"     Status: {baseline['status']} → {var_data['status']}")
+                if length_diff:
+                    print(f"     Length: {baseline['content_length']} → {var_data['content_length']} bytes")
+                if body_diff:
+                    print(f"     Body: {var_data['body_similarity']}")
+
+                # Show headers that were sent
+                print(f"     Headers sent: {var_name.split('_')[0]}")
+                changes_found = True
+
+        if not changes_found:
+            print("  ✓ No changes detected with any header variations")
+
+    # Summary statistics
+    print(f"\n\n{'='*120}")
+    print("SUMMARY STATISTICS")
+    print(f"{'='*120}\n")
+
+    total_variations = len(header_variations) - 1  # exclude baseline
+    sites_tested = len(all_results)
+    total_tests = total_variations * sites_tested
+
+    print(f"Total tests performed: {total_tests}")
+    print(f"Sites tested: {sites_tested}")
+    print(f"Header variations: {total_variations}\n")
+
+    # Count changes
+    changes_by_site = defaultdict(list)
+    for site, variations in all_results.items():
+        if "baseline" not in variations:
             continue
-        
-        status_diff = var_data["status"] != baseline["status"]
-        length_diff = var_data["content_length"] != baseline["content_length"]
-        
-        if status_diff or length_diff:
-            print(f"\n  🔴 {var_name.upper()}")
-            if status_diff:
-                print(f"     Status: {baseline['status']} → {var_data['status']}")
-            if length_diff:
-                print(f"     Length: {baseline['content_length']} → {var_data['content_length']} bytes")
-            
-            # Show headers that were sent
-            print(f"     Headers sent: {var_name.split('_')[0]}")
-            changes_found = True
-    
-    if not changes_found:
-        print("  ✓ No changes detected with any header variations")
-
-# Summary statistics
-print(f"\n\n{'='*120}")
-print("SUMMARY STATISTICS")
-print(f"{'='*120}\n")
-
-total_variations = len(header_variations) - 1  # exclude baseline
-sites_tested = len(all_results)
-total_tests = total_variations * sites_tested
-
-print(f"Total tests performed: {total_tests}")
-print(f"Sites tested: {sites_tested}")
-print(f"Header variations: {total_variations}\n")
-
-# Count changes
-changes_by_site = defaultdict(list)
-for site, variations in all_results.items():
-    if "baseline" not in variations:
-        continue
-    baseline = variations["baseline"]
-    for var_name, var_data in variations.items():
-        if var_name != "baseline" and "error" not in var_data:
-            if var_data["status"] != baseline["status"] or var_data["content_length"] != baseline["content_length"]:
-                changes_by_site[site].append(var_name)
-
-print("Response changes detected:")
-if changes_by_site:
-    for site, changes in changes_by_site.items():
-        print(f"  {site}: {len(changes)} variation(s) triggered changes")
-        for change in changes:
-            print(f"    - {change}")
-else:
-    print("  ✓ No response changes detected on any tested sites")
-
-# Save detailed results
-output_file = "/workspaces/Lab-4.1/header_fuzzing_results.json"
-with open(output_file, "w") as f:
-    # Convert unhashable types for JSON serialization
-    for site in all_results:
-        for var in all_results[site]:
-            if "headers" in all_results[site][var]:
-                all_results[site][var]["headers"] = {k: str(v) for k, v in all_results[site][var]["headers"].items()}
-    json.dump(all_results, f, indent=2)
-
-print(f"\n✓ Detailed results saved to: {output_file}")
+        baseline = variations["baseline"]
+        for var_name, var_data in variations.items():
+            if var_name != "baseline" and "error" not in var_data:
+                if (var_data["status"] != baseline["status"]
+                        or var_data["content_length"] != baseline["content_length"]
+                        or var_data.get("body_similarity", IDENTICAL) != IDENTICAL):
+                    changes_by_site[site].append(var_name)
+
+    print("Response changes detected:")
+    if changes_by_site:
+        for site, changes in changes_by_site.items():
+            print(f"  {site}: {len(changes)} variation(s) triggered changes")
+            for change in changes:
+                print(f"    - {change}")
+    else:
+        print("  ✓ No response changes detected on any tested sites")
+
+    # Save detailed results, derived from the log
+    output_file = "/workspaces/Lab-4.1/header_fuzzing_results.json"
+    nested = to_json(output_log, output_file, build=nest_results)
+    save_run("header_fuzzing", ((site, name, headers, nested[site][name])
+                                for site, headers, name in jobs if name in nested.get(site, {})))
+
+    print(f"\n✓ Results log: {output_log}")
+    print(f"✓ Detailed results saved to: {output_file}")
+    return nested
+
+if __name__ == "__main__":
+    main()
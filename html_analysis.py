@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# html_analysis.py - HTML parsing shared by parse_page and the keyword scripts
+#
+# Everything here is a plain top-level function of (url, html/bytes, ...) so it
+# can run in worker processes (see analysis_pipeline.py).
+
+import codecs
+import importlib.util
+import json
+import os
+import sys
+import urllib.parse
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+
+from keyword_matcher import KeywordMatcher
+
+
+# Tree builders, fastest first
+PARSER_BACKENDS = {
+    "lxml": "lxml",
+    "html.parser": None,   # standard library, always available
+}
+
+# html.parser stays the default: lxml is faster but builds different trees for
+# malformed markup (nested forms, markup inside <title>, unclosed <title>,
+# CDATA), see test_html_parity.py. Opt in with HTML_PARSER=lxml or parser="lxml".
+DEFAULT_PARSER = "html.parser"
+
+
+def available_parsers():
+    """Backends that can be used in this environment, fastest first."""
+    return [name for name, module in PARSER_BACKENDS.items()
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def select_parser(preferred=None):
+    """The preferred backend if it is installed, else DEFAULT_PARSER."""
+    if preferred in available_parsers():
+        return preferred
+    return DEFAULT_PARSER
+
+
+# HTML_PARSER in the environment picks a backend (e.g. HTML_PARSER=lxml)
+PARSER = select_parser(os.environ.get("HTML_PARSER"))
+
+_WIDE_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE, codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)
+
+
+def strip_nul(html, encoding=None):
+    """
+    Drop NUL characters before parsing.
+
+    Backends disagree on them (U+FFFD, kept, or, for bytes, a UTF-16 guess
+    that garbles the whole page), so they are removed up front. UTF-16/32
+    input, where NUL bytes are part of the encoding, is left alone.
+    """
+    if isinstance(html, str):
+        return html.replace("\x00", "") if "\x00" in html else html
+    if b"\x00" not in html or html.startswith(_WIDE_BOMS) \
+            or (encoding or "").lower().replace("_", "-").startswith(("utf-16", "utf-32")):
+        return html
+    return html.replace(b"\x00", b"")
+
+
+def make_soup(html, encoding=None, parser=None):
+    """Parse a str, or bytes in the given (or sniffed) encoding, with the selected backend."""
+    parser = parser or PARSER
+    html = strip_nul(html, encoding)
+    if isinstance(html, bytes):
+        return BeautifulSoup(html, parser, from_encoding=encoding)
+    return BeautifulSoup(html, parser)
+
+
+def extract_page(url, html, encoding=None, parser=None):
+    """Title, meta description and forms (actions resolved against url) of a page."""
+    return extract_from_soup(url, make_soup(html, encoding, parser))
+
+
+def extract_from_soup(url, soup):
+    """extract_page for a page that has already been parsed."""
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    meta = soup.find("meta", attrs={"name": "description"})
+    meta_desc = meta["content"].strip() if meta and meta.get("content") else None
+
+    forms = []
+    for f in soup.find_all("form"):
+        method = f.get("method", "GET").upper()
+        action = urllib.parse.urljoin(url, f.get("action", ""))
+        inputs = []
+        for inp in f.find_all("input"):
+            inputs.append({
+                "name": inp.get("name"),
+                "type": inp.get("type"),
+                "value": inp.get("value")
+            })
+        forms.append({"method": method, "action": action, "inputs": inputs})
+
+    return {
+        "url": url,
+        "title": title,
+        "meta_description": meta_desc,
+        "forms": forms
+    }
+
+
+def page_text(html, encoding=None, parser=None):
+    """Visible text of a page, lowercased, the way the keyword scripts compare it."""
+    return text_from_soup(make_soup(html, encoding, parser))
+
+
+def text_from_soup(soup):
+    """page_text for a page that has already been parsed."""
+    return soup.get_text(separator=" ").lower()
+
+
+@lru_cache(maxsize=32)
+def get_matcher(keywords, whole_word=False):
+    """Compiled matcher for a keyword tuple, reused across pages."""
+    return KeywordMatcher(keywords, whole_word=whole_word)
+
+
+def keyword_counts(text, keywords, whole_word=False):
+    """Occurrences of each keyword in already-lowercased text, counted in one pass."""
+    return get_matcher(tuple(keywords), whole_word).count(text)
+
+
+def analyze_keywords(url, html, encoding=None, keywords=(), whole_word=False, offsets=False):
+    """Text length and keyword counts (optionally match offsets) for one page."""
+    text = page_text(html, encoding)
+    matcher = get_matcher(tuple(keywords), whole_word)
+    result = {
+        "text_length": len(text),
+        "keyword_counts": matcher.count(text),
+    }
+    if offsets:
+        result["keyword_offsets"] = matcher.offsets(text)
+    return result
+
+
+def check_parity(html, url="http://localhost/", parsers=None):
+    """
+    Compare extraction across parser backends.
+
+    Returns {field: {backend: value}} for every field (title, meta_description,
+    forms, text) on which the backends disagree; an empty dict means parity.
+    Text is compared with whitespace runs collapsed, since backends keep
+    different whitespace-only nodes around <html>/<head>.
+    """
+    parsers = parsers or available_parsers()
+    outputs = {}
+    for parser in parsers:
+        page = extract_page(url, html, parser=parser)
+        page["text"] = " ".join(page_text(html, parser=parser).split())
+        outputs[parser] = page
+    mismatches = {}
+    for field in ("title", "meta_description", "forms", "text"):
+        values = {parser: out[field] for parser, out in outputs.items()}
+        if len({json.dumps(v, sort_keys=True) for v in values.values()}) > 1:
+            mismatches[field] = values
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python html_analysis.py --parity page.html [...] : check backends agree on saved pages
+    if len(sys.argv) < 3 or sys.argv[1] != "--parity":
+        print("Usage: python html_analysis.py --parity <file.html> [...]")
+        sys.exit(1)
+    print(f"Parser backends: {', '.join(available_parsers())} (selected: {PARSER})")
+    failed = 0
+    for path in sys.argv[2:]:
+        with open(path, "rb") as fh:
+            mismatches = check_parity(fh.read())
+        if mismatches:
+            failed += 1
+            print(f"✗ {path}: differs in {', '.join(mismatches)}")
+            for field, values in mismatches.items():
+                for parser, value in values.items():
+                    print(f"    {parser:12} {field}: {str(value)[:100]}")
+        else:
+            print(f"✓ {path}")
+    sys.exit(1 if failed else 0)
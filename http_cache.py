@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# http_cache.py - On-disk HTTP validation cache (ETag / Last-Modified)
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import http_clients
+
+CACHE_DIR = ".http_cache"
+MAX_CACHE_BYTES = 256 * 1024 * 1024   # least recently used entries are evicted beyond this
+
+_sizes = {}   # cache_dir -> bytes on disk, so eviction only scans when over budget
+_sizes_lock = threading.Lock()   # pipeline and collect_headers store from worker threads
+
+
+def cache_key(url, headers=None):
+    """Cache key for a URL plus the request headers that were sent with it."""
+    items = sorted((k.lower(), str(v)) for k, v in (headers or {}).items())
+    return hashlib.sha256(json.dumps([url, items]).encode()).hexdigest()
+
+
+def _paths(cache_dir, key):
+    base = Path(cache_dir) / key[:2]
+    return base / f"{key}.json", base / f"{key}.body"
+
+
+def _write_atomic(path, data):
+    # One temp file per writer: threads storing the same key must not share it
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def _load(cache_dir, key):
+    meta_path, body_path = _paths(cache_dir, key)
+    try:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        with open(body_path, "rb") as fh:
+            body = fh.read()
+    except (OSError, ValueError):
+        return None, None
+    return meta, body
+
+
+def _store(cache_dir, key, r, max_bytes):
+    meta_path, body_path = _paths(cache_dir, key)
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "url": r.request.url,
+        "final_url": r.url,
+        "status": r.status_code,
+        "headers": dict(r.headers),
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "encoding": r.encoding,
+    }
+    data = json.dumps(meta).encode()
+    _write_atomic(body_path, r.content)
+    _write_atomic(meta_path, data)
+    with _sizes_lock:
+        if cache_dir in _sizes:
+            _sizes[cache_dir] += len(data) + len(r.content)
+            if _sizes[cache_dir] <= max_bytes:
+                return
+        _evict(cache_dir, max_bytes)
+
+
+def _touch(cache_dir, key):
+    meta_path, _ = _paths(cache_dir, key)
+    try:
+        os.utime(meta_path)
+    except OSError:
+        pass
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    with _sizes_lock:
+        _evict(cache_dir, max_bytes)
+
+
+def _evict(cache_dir, max_bytes):
+    entries = []
+    total = 0
+    for meta_path in Path(cache_dir).glob("*/*.json"):
+        body_path = meta_path.with_suffix(".body")
+        try:
+            size = meta_path.stat().st_size + body_path.stat().st_size
+            used = meta_path.stat().st_mtime
+        except OSError:
+            continue
+        entries.append((used, size, meta_path, body_path))
+        total += size
+    for used, size, meta_path, body_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in (meta_path, body_path):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        total -= size
+    _sizes[cache_dir] = total
+
+
+def cached_get(url, headers=None, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, **kwargs):
+    """
+    GET a URL through the validation cache.
+
+    A stored ETag / Last-Modified is sent as If-None-Match / If-Modified-Since;
+    on a 304 the stored status, headers and body are returned with the 304's
+    updated headers applied. Returns a requests.Response whose from_cache
+    attribute says whether the body came from disk.
+    """
+    key = cache_key(url, headers)
+    meta, body = _load(cache_dir, key)
+
+    send = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            send["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            send["If-Modified-Since"] = meta["last_modified"]
+
+    r = http_clients.get(url, headers=send, **kwargs)
+    r.from_cache = False
+
+    if r.status_code == 304 and meta:
+        fresh = {k: v for k, v in r.headers.items()
+                 if k.lower() not in ("content-length", "transfer-encoding", "content-encoding")}
+        r.status_code = meta["status"]
+        r.headers.clear()
+        r.headers.update(meta["headers"])
+        r.headers.update(fresh)
+        r._content = body
+        r.encoding = meta.get("encoding")
+        r.from_cache = True
+        _touch(cache_dir, key)
+    elif r.status_code == 200 and (r.headers.get("ETag") or r.headers.get("Last-Modified")):
+        _store(cache_dir, key, r, max_bytes)
+
+    return r
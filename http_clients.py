@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# http_clients.py - Shared keep-alive HTTP client registry
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Registry settings (change with configure())
+POOL_SIZE = 10        # keep-alive connections kept per client
+IDLE_TIMEOUT = 60.0   # seconds before an unused client is closed
+MAX_CLIENTS = 256     # least recently used clients are closed beyond this
+CONNECT_RETRIES = 1
+BACKOFF_FACTOR = 0.5
+HEAD_REJECTED = (400, 405, 501)   # statuses treated as "this server doesn't do HEAD"
+
+_clients = OrderedDict()   # (scheme, host, verify) -> [session, last_used, in_use]
+_evicted = {}              # id(session) -> entry, for evicted clients still in use
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def configure(pool_size=None, idle_timeout=None, max_clients=None, connect_retries=None):
+    """Change registry settings; existing clients are closed so the new settings apply."""
+    global POOL_SIZE, IDLE_TIMEOUT, MAX_CLIENTS, CONNECT_RETRIES
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if idle_timeout is not None:
+        IDLE_TIMEOUT = idle_timeout
+    if max_clients is not None:
+        MAX_CLIENTS = max_clients
+    if connect_retries is not None:
+        CONNECT_RETRIES = connect_retries
+    close_all()
+
+
+def _new_session(verify):
+    session = requests.Session()
+    session.verify = verify
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=POOL_SIZE,
+        # Only connection failures are retried here; throttling is rate_limit's job
+        max_retries=Retry(total=CONNECT_RETRIES, read=False, status=0, backoff_factor=BACKOFF_FACTOR,
+                          respect_retry_after_header=False, raise_on_status=False),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _evict(entry):
+    """
+    Drop a client from the registry (caller holds the lock).
+
+    A client another thread is still sending through is only closed when
+    that thread checks it back in.
+    """
+    if entry[2]:
+        _evicted[id(entry[0])] = entry
+    else:
+        entry[0].close()
+
+
+def _sweep(now):
+    """Evict clients idle for longer than IDLE_TIMEOUT (caller holds the lock)."""
+    global _last_sweep
+    _last_sweep = now
+    for key in [k for k, (_, used, in_use) in _clients.items() if not in_use and now - used > IDLE_TIMEOUT]:
+        _evict(_clients.pop(key))
+
+
+def _checkout(url, verify):
+    parts = urlsplit(url)
+    key = (parts.scheme.lower(), parts.netloc.lower(), bool(verify))
+    now = time.monotonic()
+    with _lock:
+        if now - _last_sweep > IDLE_TIMEOUT / 2:
+            _sweep(now)
+        entry = _clients.get(key)
+        if entry is None:
+            entry = _clients[key] = [_new_session(verify), now, 0]
+            while len(_clients) > MAX_CLIENTS:
+                _evict(_clients.popitem(last=False)[1])
+        else:
+            entry[1] = now
+            _clients.move_to_end(key)
+        # Clients share connections, not state: cookies set during one request's
+        # redirect chain are kept for that chain only
+        entry[0].cookies.clear()
+        entry[2] += 1
+        return entry
+
+
+def _checkin(entry):
+    with _lock:
+        entry[2] -= 1
+        entry[1] = time.monotonic()
+        entry[0].cookies.clear()
+        if not entry[2] and _evicted.pop(id(entry[0]), None) is not None:
+            entry[0].close()
+
+
+@contextmanager
+def session_for(url, verify=True):
+    """The pooled session for the URL's (scheme, host, verify), kept open while the block runs."""
+    entry = _checkout(url, verify)
+    try:
+        yield entry[0]
+    finally:
+        _checkin(entry)
+
+
+def get_session(url, verify=True):
+    """
+    Return the pooled session for the URL's (scheme, host, verify).
+
+    The session is not checked out, so it may be closed by eviction while
+    in use; prefer session_for() or request().
+    """
+    with session_for(url, verify) as session:
+        return session
+
+
+def request(method, url, verify=True, **kwargs):
+    """Send a request through the pooled client for this URL."""
+    with session_for(url, verify) as session:
+        return session.request(method, url, verify=verify, **kwargs)
+
+
+def get(url, verify=True, **kwargs):
+    """Drop-in replacement for requests.get that reuses pooled connections."""
+    kwargs.setdefault("allow_redirects", True)
+    return request("GET", url, verify=verify, **kwargs)
+
+
+def head(url, verify=True, **kwargs):
+    """Drop-in replacement for requests.head that reuses pooled connections."""
+    kwargs.setdefault("allow_redirects", False)
+    return request("HEAD", url, verify=verify, **kwargs)
+
+
+def fetch_headers(url, verify=True, need_body=False, **kwargs):
+    """
+    Fetch only the response headers of a URL.
+
+    Sends HEAD (following redirects); if the server rejects HEAD, sends a
+    streamed GET and closes the connection as soon as the headers are in.
+    need_body=True skips straight to a normal, fully read GET for callers
+    that also want body-derived fields.
+    """
+    kwargs.setdefault("allow_redirects", True)
+    if need_body:
+        return get(url, verify=verify, **kwargs)
+    r = head(url, verify=verify, **kwargs)
+    if r.status_code not in HEAD_REJECTED:
+        return r
+    r = get(url, verify=verify, stream=True, **kwargs)
+    r.close()
+    return r
+
+
+def close_all():
+    """Close every pooled client."""
+    with _lock:
+        while _clients:
+            _evict(_clients.popitem()[1])
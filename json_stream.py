@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# json_stream.py - Iterate over large JSON / NDJSON result files one record at a time
+
+import json
+import re
+import sys
+from itertools import groupby
+
+import result_sink
+
+CHUNK_SIZE = 256 * 1024
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+WHITESPACE = " \t\n\r"
+SCALAR_END = re.compile(r"[\s,:\]}]")
+
+# How deep records sit in each result file layout
+SHAPE_DEPTH = {
+    "list": 1,      # [record, ...]                      (Headers.json)
+    "mapping": 1,   # {site: record}                     (keyword_results*.json)
+    "grouped": 2,   # {site: [record, ...]}              (header_probe_comparison.json)
+    "nested": 2,    # {site: {variation: record}}        (header_fuzzing, advanced_header_fuzzing)
+}
+
+
+class _Reader:
+    """A file read through a sliding text buffer, decoded one JSON value at a time."""
+
+    def __init__(self, fh, chunk_size=CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.pos > len(self.buf) // 2:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        chunk = self.fh.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+
+    def peek(self):
+        """Next non-whitespace character (without consuming it), or "" at end of file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def take(self, expected):
+        if self.peek() != expected:
+            raise ValueError(f"expected {expected!r} at offset {self.pos}, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more of the file as needed."""
+        if self.peek() not in ("{", "[", '"'):
+            # Numbers and literals are not self-delimiting: "-1." decodes as -1,
+            # so make sure the whole token is buffered before decoding it
+            while not self.eof and not SCALAR_END.search(self.buf, self.pos):
+                self._fill()
+        while True:
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+
+
+def _walk(reader, depth, path):
+    if depth == 0 or reader.peek() not in ("{", "["):
+        yield path, reader.value()
+        return
+    is_object = reader.peek() == "{"
+    reader.take(reader.peek())
+    index = 0
+    while True:
+        c = reader.peek()
+        if c in ("}", "]"):
+            reader.take(c)
+            return
+        if c == ",":
+            reader.take(",")
+            continue
+        if is_object:
+            key = reader.value()
+            reader.take(":")
+        else:
+            key, index = index, index + 1
+        yield from _walk(reader, depth - 1, path + (key,))
+
+
+def iter_json(path, depth=1):
+    """
+    Yield (key_path, value) for every value `depth` levels into a JSON document.
+
+    Only one value at that depth is held in memory at a time, e.g. depth=2 on
+    {site: {variation: record}} yields ((site, variation), record) pairs.
+    """
+    with open(path, encoding="utf-8") as fh:
+        yield from _walk(_Reader(fh), depth, ())
+
+
+def iter_records(path, shape="list"):
+    """
+    Yield each record of a result file as a dict, one at a time.
+
+    shape is the file's layout (see SHAPE_DEPTH). Records are the same dicts
+    the scripts wrote; for keyed layouts the site (and variation) they were
+    filed under is added as "site" (and "variation") when not already present.
+    NDJSON logs (.ndjson/.jsonl, including rotated segments) are read line by
+    line and their records are expected to carry those keys themselves.
+    """
+    if path.endswith(NDJSON_SUFFIXES):
+        yield from result_sink.iter_records(path)
+        return
+    for keys, record in iter_json(path, SHAPE_DEPTH[shape]):
+        if shape != "list" and isinstance(record, dict):
+            record.setdefault("site", keys[0])
+            if shape == "nested":
+                record.setdefault("variation", keys[1])
+        yield record
+
+
+def iter_sites(records, adjacent=False):
+    """
+    Group records by site: yields (site, [record, ...]) one site at a time.
+
+    NDJSON logs and stored runs interleave sites, so by default every record
+    is collected per site first; sites come out in order of first appearance.
+    With adjacent=True the records must already be grouped by site, as in
+    every keyed JSON layout, and only one site's records are held at a time.
+    """
+    if adjacent:
+        for site, group in groupby(records, key=lambda r: r.get("site")):
+            yield site, list(group)
+        return
+    sites = {}
+    for record in records:
+        sites.setdefault(record.get("site"), []).append(record)
+    yield from sites.items()
+
+
+def iter_site_groups(path, shape):
+    """iter_sites over a result file, holding one site at a time when its layout allows it."""
+    keyed = shape != "list" and not path.endswith(NDJSON_SUFFIXES)
+    return iter_sites(iter_records(path, shape), adjacent=keyed)
+
+
+if __name__ == "__main__":
+    # python json_stream.py <file> [shape] : count records without loading the file
+    if len(sys.argv) < 2:
+        print(f"Usage: python json_stream.py <file.json|file.ndjson> [{'|'.join(SHAPE_DEPTH)}]")
+        sys.exit(1)
+    shape = sys.argv[2] if len(sys.argv) > 2 else "list"
+    sites = set()
+    count = 0
+    for record in iter_records(sys.argv[1], shape):
+        count += 1
+        sites.add(record.get("site"))
+    print(f"{count} records across {len(sites - {None})} sites")
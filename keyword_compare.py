@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # keyword_compare.py - Compare keyword counts across different sites
 
-import requests
-from bs4 import BeautifulSoup
 import json
+import sys
 from collections import defaultdict
+from functools import partial
+
+from page_analyzer import analyze_urls
+from text_index import TextIndex
 
 # Keywords to search for
 keywords = ["admin", "login", "debug", "error"]
@@ -16,89 +19,104 @@ sites = [
     "http://info.cern.ch",  # Historical website
 ]
 
-results = {}
+# Count whole words only ("admin" no longer matches inside "administrator")
+WHOLE_WORD = False
 
-print("=" * 70)
-print("KEYWORD COUNT COMPARISON ACROSS SITES")
-print("=" * 70)
-print(f"\nKeywords being searched: {keywords}\n")
+# Revalidate pages against the on-disk cache instead of re-downloading them
+USE_HTTP_CACHE = False
 
-for url in sites:
+def report_site(url, result, results, index=None, run_id=None):
+    """Store one site's result in results (and its text in index) and print it."""
     print(f"\nFetching: {url}")
     print("-" * 70)
     
-    try:
-        r = requests.get(url, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        
-        # Extract text and convert to lowercase
-        text = soup.get_text(separator=" ").lower()
-        
-        # Count keyword occurrences
-        kw_counts = {k: text.count(k) for k in keywords}
-        
-        # Store results
-        results[url] = {
-            "status": r.status_code,
-            "content_length": len(r.text),
-            "text_length": len(text),
-            "keyword_counts": kw_counts
-        }
-        
-        # Display results for this site
-        print(f"Status Code: {r.status_code}")
-        print(f"Content Length: {len(r.text)} characters")
-        print(f"Text Length (extracted): {len(text)} characters")
-        print(f"Keyword Counts:")
-        for kw, count in kw_counts.items():
-            print(f"  - {kw:10} : {count:4} occurrences")
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error fetching {url}: {e}")
-        results[url] = {"error": str(e)}
-
-# Summary comparison
-print("\n" + "=" * 70)
-print("SUMMARY COMPARISON")
-print("=" * 70)
-
-# Create comparison table
-print(f"\n{'URL':<40}", end="")
-for kw in keywords:
-    print(f"{kw:>10}", end="")
-print()
-print("-" * (40 + len(keywords) * 10))
-
-for url, data in results.items():
-    if "error" not in data:
-        print(f"{url:<40}", end="")
-        for kw in keywords:
-            count = data["keyword_counts"].get(kw, 0)
-            print(f"{count:>10}", end="")
-        print()
-
-# Find which keyword is most common
-print("\n" + "=" * 70)
-print("KEYWORD FREQUENCY ANALYSIS")
-print("=" * 70)
-
-total_counts = defaultdict(int)
-for url, data in results.items():
-    if "error" not in data:
-        for kw, count in data["keyword_counts"].items():
-            total_counts[kw] += count
-
-print("\nTotal occurrences across all sites:")
-for kw in keywords:
-    print(f"  {kw:10}: {total_counts[kw]:4} occurrences")
-
-if total_counts:
-    most_common = max(total_counts, key=total_counts.get)
-    print(f"\nMost common keyword: '{most_common}' ({total_counts[most_common]} occurrences)")
-
-# Save detailed results to JSON
-output_file = "/workspaces/Lab-4.1/keyword_results.json"
-with open(output_file, "w") as f:
-    json.dump(results, f, indent=2)
-
-print(f"\n✓ Detailed results saved to: {output_file}")
+    if "error" in result:
+        print(f"❌ Error fetching {url}: {result['error']}")
+        results[url] = {"error": result["error"]}
+        return
+    
+    text = result.pop("text", None)
+    if index:
+        index.add(run_id, url, text)
+    results[url] = result
+    
+    # Display results for this site
+    print(f"Status Code: {result['status']}")
+    print(f"Content Length: {result['content_length']} bytes")
+    print(f"Text Length (extracted): {result['text_length']} characters")
+    print(f"Keyword Counts:")
+    for kw, count in result["keyword_counts"].items():
+        print(f"  - {kw:10} : {count:4} occurrences")
+
+def main(argv=None):
+    """Count the keywords on every site, compare them and save the results."""
+    args = sys.argv[1:] if argv is None else argv
+    # --index: also add each page's text to the inverted index next to the scripts
+    # (query it later with text_index.py)
+    index_text = "--index" in args
+    results = {}
+
+    print("=" * 70)
+    print("KEYWORD COUNT COMPARISON ACROSS SITES")
+    print("=" * 70)
+    print(f"\nKeywords being searched: {keywords}\n")
+
+    index = TextIndex() if index_text else None
+    run_id = index.start_run("keyword_compare") if index else None
+
+    # Fetch concurrently; parse and count keywords in worker processes
+    analyze_urls(sites, extractors=["keywords", "text"] if index else ["keywords"],
+                 on_result=partial(report_site, results=results, index=index, run_id=run_id),
+                 cache=USE_HTTP_CACHE, keywords=keywords, whole_word=WHOLE_WORD)
+    if index:
+        index.close()
+
+    # Summary comparison
+    print("\n" + "=" * 70)
+    print("SUMMARY COMPARISON")
+    print("=" * 70)
+
+    # Create comparison table
+    print(f"\n{'URL':<40}", end="")
+    for kw in keywords:
+        print(f"{kw:>10}", end="")
+    print()
+    print("-" * (40 + len(keywords) * 10))
+
+    for url, data in results.items():
+        if "error" not in data:
+            print(f"{url:<40}", end="")
+            for kw in keywords:
+                count = data["keyword_counts"].get(kw, 0)
+                print(f"{count:>10}", end="")
+            print()
+
+    # Find which keyword is most common
+    print("\n" + "=" * 70)
+    print("KEYWORD FREQUENCY ANALYSIS")
+    print("=" * 70)
+
+    total_counts = defaultdict(int)
+    for url, data in results.items():
+        if "error" not in data:
+            for kw, count in data["keyword_counts"].items():
+                total_counts[kw] += count
+
+    print("\nTotal occurrences across all sites:")
+    for kw in keywords:
+        print(f"  {kw:10}: {total_counts[kw]:4} occurrences")
+
+    if total_counts:
+        most_common = max(total_counts, key=total_counts.get)
+        print(f"\nMost common keyword: '{most_common}' ({total_counts[most_common]} occurrences)")
+
+    # Save detailed results to JSON
+    output_file = "/workspaces/Lab-4.1/keyword_results.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n✓ Detailed results saved to: {output_file}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 # keyword_compare_local.py - Compare keyword counts from local HTML files and URLs
 
-from bs4 import BeautifulSoup
 import json
+import sys
 from collections import defaultdict
-import requests
+from functools import partial
 import os
 
+from analysis_pipeline import run_pipeline
+from corpus_scan import print_summary, scan_corpus, scan_file_raw
+from html_analysis import analyze_keywords, keyword_counts, page_text
+
 # Keywords to search for
 keywords = ["admin", "login", "debug", "error"]
 
@@ -21,137 +25,177 @@ remote_sites = [
     "http://example.com",
 ]
 
-results = {}
-
-print("=" * 70)
-print("KEYWORD COUNT COMPARISON - LOCAL FILES & REMOTE SITES")
-print("=" * 70)
-print(f"\nKeywords being searched: {keywords}\n")
-
-# Analyze local files
-print("LOCAL FILES")
-print("-" * 70)
-
-for filepath in local_files:
-    if not os.path.exists(filepath):
-        print(f"⚠️  File not found: {filepath}")
-        continue
-    
-    print(f"\nAnalyzing: {filepath}")
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        soup = BeautifulSoup(content, "html.parser")
-        text = soup.get_text(separator=" ").lower()
-        
-        kw_counts = {k: text.count(k) for k in keywords}
-        
-        results[filepath] = {
-            "type": "local_file",
-            "content_length": len(content),
-            "text_length": len(text),
-            "keyword_counts": kw_counts
-        }
-        
-        print(f"File Size: {len(content)} characters")
-        print(f"Extracted Text Length: {len(text)} characters")
-        print(f"Keyword Counts:")
-        for kw, count in kw_counts.items():
-            print(f"  - {kw:10} : {count:4} occurrences")
-            
-    except Exception as e:
-        print(f"❌ Error analyzing {filepath}: {e}")
-        results[filepath] = {"error": str(e)}
+# Count whole words only ("admin" no longer matches inside "administrator")
+WHOLE_WORD = False
 
-# Analyze remote sites
-print("\n\nREMOTE SITES")
-print("-" * 70)
+# Corpus mode: python keyword_compare_local.py --corpus [--out file.ndjson] [--raw] <dir|glob> [...]
+# scans saved snapshots in a process pool and streams per-file results to NDJSON.
+# Pages are parsed and their visible text counted, as below, unless --raw is given
+CORPUS_OUTPUT = "keyword_corpus_results.ndjson"
 
-for url in remote_sites:
+def report_remote(url, result, results):
+    """Store and print one remote site's result as the pipeline releases it."""
     print(f"\nFetching: {url}")
-    try:
-        r = requests.get(url, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
+    if "error" in result:
+        print(f"❌ Error fetching {url}: {result['error']}")
+        results[url] = {"error": result["error"]}
+        return
+    
+    results[url] = {"type": "remote_site", **result}
+    
+    print(f"Status Code: {result['status']}")
+    print(f"Content Length: {result['content_length']} bytes")
+    print(f"Extracted Text Length: {result['text_length']} characters")
+    print(f"Keyword Counts:")
+    for kw, count in result["keyword_counts"].items():
+        print(f"  - {kw:10} : {count:4} occurrences")
+
+def main(argv=None):
+    """Count the keywords in the local files and remote sites (or a whole corpus) and compare them."""
+    args = sys.argv[1:] if argv is None else argv
+    # --raw: count keywords in the memory-mapped file bytes instead of parsing the page
+    # (markup counts too); --skip-scripts leaves out <script>/<style> bodies
+    raw = "--raw" in args
+    skip_scripts = "--skip-scripts" in args
+
+    if "--corpus" in args:
+        sources = [a for a in args if a not in ("--corpus", "--raw", "--skip-scripts")]
+        out_file = CORPUS_OUTPUT
+        if "--out" in sources:
+            i = sources.index("--out")
+            out_file = sources[i + 1]
+            del sources[i:i + 2]
+        print("=" * 70)
+        print("KEYWORD CORPUS SCAN")
+        print("=" * 70)
+        print(f"\nKeywords being searched: {keywords}")
+        print(f"Sources: {', '.join(sources)}\n")
+        print_summary(scan_corpus(sources, keywords, out_file, WHOLE_WORD,
+                                  raw=raw, skip_scripts=skip_scripts))
+        print(f"\n✓ Per-file results saved to: {out_file}")
+        return
+
+    results = {}
+
+    print("=" * 70)
+    print("KEYWORD COUNT COMPARISON - LOCAL FILES & REMOTE SITES")
+    print("=" * 70)
+    print(f"\nKeywords being searched: {keywords}\n")
+
+    # Analyze local files
+    print("LOCAL FILES")
+    print("-" * 70)
+
+    for filepath in local_files:
+        if not os.path.exists(filepath):
+            print(f"⚠️  File not found: {filepath}")
+            continue
+    
+        print(f"\nAnalyzing: {filepath}")
+        if raw:
+            result = scan_file_raw(filepath, keywords, WHOLE_WORD, skip_scripts)
+            result.pop("path")
+            results[filepath] = result
+            if "error" in result:
+                print(f"❌ Error analyzing {filepath}: {result['error']}")
+                continue
+            print(f"File Size: {result['content_length']} bytes (raw byte scan)")
+            print(f"Keyword Counts:")
+            for kw, count in result["keyword_counts"].items():
+                print(f"  - {kw:10} : {count:4} occurrences")
+            continue
+        try:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
         
-        text = soup.get_text(separator=" ").lower()
-        kw_counts = {k: text.count(k) for k in keywords}
+            text = page_text(content)
+            kw_counts = keyword_counts(text, keywords, WHOLE_WORD)
         
-        results[url] = {
-            "type": "remote_site",
-            "status": r.status_code,
-            "content_length": len(r.text),
-            "text_length": len(text),
-            "keyword_counts": kw_counts
-        }
+            results[filepath] = {
+                "type": "local_file",
+                "content_length": len(content),
+                "text_length": len(text),
+                "keyword_counts": kw_counts
+            }
         
-        print(f"Status Code: {r.status_code}")
-        print(f"Content Length: {len(r.text)} characters")
-        print(f"Extracted Text Length: {len(text)} characters")
-        print(f"Keyword Counts:")
-        for kw, count in kw_counts.items():
-            print(f"  - {kw:10} : {count:4} occurrences")
+            print(f"File Size: {len(content)} characters")
+            print(f"Extracted Text Length: {len(text)} characters")
+            print(f"Keyword Counts:")
+            for kw, count in kw_counts.items():
+                print(f"  - {kw:10} : {count:4} occurrences")
             
-    except Exception as e:
-        print(f"❌ Error fetching {url}: {e}")
-        results[url] = {"error": str(e)}
-
-# Summary comparison
-print("\n" + "=" * 70)
-print("SUMMARY COMPARISON TABLE")
-print("=" * 70)
-
-print(f"\n{'Source':<45}", end="")
-for kw in keywords:
-    print(f"{kw:>10}", end="")
-print()
-print("-" * (45 + len(keywords) * 10))
-
-for source, data in results.items():
-    if "error" not in data:
-        display_name = source.replace('/workspaces/Lab-4.1/', '')
-        print(f"{display_name:<45}", end="")
-        for kw in keywords:
-            count = data["keyword_counts"].get(kw, 0)
-            print(f"{count:>10}", end="")
-        print()
-
-# Keyword frequency analysis
-print("\n" + "=" * 70)
-print("KEYWORD FREQUENCY ANALYSIS")
-print("=" * 70)
-
-total_counts = defaultdict(int)
-for source, data in results.items():
-    if "error" not in data:
-        for kw, count in data["keyword_counts"].items():
-            total_counts[kw] += count
-
-print("\nTotal occurrences across all sources:")
-for kw in keywords:
-    count = total_counts[kw]
-    print(f"  {kw:10}: {count:4} occurrences", end="")
-    if count > 0:
-        print(f" ({'Found on:' if count > 0 else ''})", end="")
+        except Exception as e:
+            print(f"❌ Error analyzing {filepath}: {e}")
+            results[filepath] = {"error": str(e)}
+
+    # Analyze remote sites
+    print("\n\nREMOTE SITES")
+    print("-" * 70)
+
+    # Fetch concurrently; parse and count keywords in worker processes
+    run_pipeline(remote_sites, partial(analyze_keywords, keywords=keywords, whole_word=WHOLE_WORD),
+                 on_result=partial(report_remote, results=results),
+                 timeout=10)
+
+    # Summary comparison
+    print("\n" + "=" * 70)
+    print("SUMMARY COMPARISON TABLE")
+    print("=" * 70)
+
+    print(f"\n{'Source':<45}", end="")
+    for kw in keywords:
+        print(f"{kw:>10}", end="")
     print()
+    print("-" * (45 + len(keywords) * 10))
 
-# Show which sources had keywords
-print("\nKeyword locations:")
-for kw in keywords:
-    found_in = []
     for source, data in results.items():
-        if "error" not in data and data["keyword_counts"].get(kw, 0) > 0:
+        if "error" not in data:
             display_name = source.replace('/workspaces/Lab-4.1/', '')
-            found_in.append(f"{display_name} ({data['keyword_counts'][kw]}x)")
+            print(f"{display_name:<45}", end="")
+            for kw in keywords:
+                count = data["keyword_counts"].get(kw, 0)
+                print(f"{count:>10}", end="")
+            print()
+
+    # Keyword frequency analysis
+    print("\n" + "=" * 70)
+    print("KEYWORD FREQUENCY ANALYSIS")
+    print("=" * 70)
+
+    total_counts = defaultdict(int)
+    for source, data in results.items():
+        if "error" not in data:
+            for kw, count in data["keyword_counts"].items():
+                total_counts[kw] += count
+
+    print("\nTotal occurrences across all sources:")
+    for kw in keywords:
+        count = total_counts[kw]
+        print(f"  {kw:10}: {count:4} occurrences", end="")
+        if count > 0:
+            print(f" ({'Found on:' if count > 0 else ''})", end="")
+        print()
+
+    # Show which sources had keywords
+    print("\nKeyword locations:")
+    for kw in keywords:
+        found_in = []
+        for source, data in results.items():
+            if "error" not in data and data["keyword_counts"].get(kw, 0) > 0:
+                display_name = source.replace('/workspaces/Lab-4.1/', '')
+                found_in.append(f"{display_name} ({data['keyword_counts'][kw]}x)")
     
-    if found_in:
-        print(f"  '{kw}': {', '.join(found_in)}")
-    else:
-        print(f"  '{kw}': Not found in any source")
+        if found_in:
+            print(f"  '{kw}': {', '.join(found_in)}")
+        else:
+            print(f"  '{kw}': Not found in any source")
+
+    # Save detailed results to JSON
+    output_file = "/workspaces/Lab-4.1/keyword_results_detailed.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
 
-# Save detailed results to JSON
-output_file = "/workspaces/Lab-4.1/keyword_results_detailed.json"
-with open(output_file, "w") as f:
-    json.dump(results, f, indent=2)
+    print(f"\n✓ Detailed results saved to: {output_file}")
 
-print(f"\n✓ Detailed results saved to: {output_file}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# keyword_matcher.py - Count many keywords in one pass over a text
+
+import re
+
+
+def _trie_pattern(node):
+    """Regex for a trie node; longer continuations are tried first so matches are longest."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    """
+    Compiled multi-keyword matcher with Aho-Corasick semantics.
+
+    The keyword set is folded into a trie and compiled into one regular
+    expression that the C regex engine runs over the text once. Every
+    occurrence of every keyword is reported, including overlapping ones and
+    keywords that are prefixes of other keywords, so substring counts equal
+    text.count(k) for keywords that don't overlap themselves.
+
+    whole_word=True only counts keywords not touching a word character on
+    either side ("admin" no longer matches inside "administrator").
+    ignore_case=True lowercases the keywords and matches case-insensitively;
+    otherwise pass text that is already lowercased.
+
+    binary=True compiles a bytes pattern (keywords UTF-8 encoded) that can scan
+    bytes, bytearray or mmap objects directly; keywords are still reported as
+    str. Case folding on bytes covers ASCII letters only.
+    """
+
+    def __init__(self, keywords, whole_word=False, ignore_case=False, binary=False):
+        self.keywords = list(dict.fromkeys(k.lower() if ignore_case else k for k in keywords if k))
+        self.whole_word = whole_word
+        self.ignore_case = ignore_case
+        self.binary = binary
+
+        trie = {}
+        for kw in self.keywords:
+            node = trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        core = _trie_pattern(trie) or "(?!)"
+        if whole_word:
+            pattern = rf"(?<!\w)(?=({core})(?!\w))"
+        else:
+            pattern = f"(?=({core}))"
+        if binary:
+            pattern = pattern.encode("utf-8")
+        self._regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+        # The regex reports the longest keyword starting at a position; the
+        # shorter keywords that also match there are prefixes of it
+        self._implied = {}
+        for kw in self.keywords:
+            self._implied[kw] = [
+                other for other in self.keywords
+                if kw.startswith(other)
+                and (not whole_word or other == kw or not _is_word(kw[len(other)]))
+            ]
+
+    def finditer(self, text, pos=0, endpos=None):
+        """Yield (offset, keyword) for every occurrence in text[pos:endpos], in offset order."""
+        implied = self._implied
+        matches = self._regex.finditer(text, pos) if endpos is None else self._regex.finditer(text, pos, endpos)
+        for m in matches:
+            found = m.group(1)
+            if self.binary:
+                found = found.decode("utf-8")
+            if self.ignore_case:
+                found = found.lower()
+            for kw in implied[found]:
+                yield m.start(), kw
+
+    def find(self, text):
+        """List of (offset, keyword) for every occurrence."""
+        return list(self.finditer(text))
+
+    def count(self, text):
+        """Occurrences of each keyword, in keyword order."""
+        counts = dict.fromkeys(self.keywords, 0)
+        for _, kw in self.finditer(text):
+            counts[kw] += 1
+        return counts
+
+    def offsets(self, text):
+        """Start offsets of each keyword, in keyword order."""
+        found = {kw: [] for kw in self.keywords}
+        for start, kw in self.finditer(text):
+            found[kw].append(start)
+        return found
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
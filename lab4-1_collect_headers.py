@@ -2,51 +2,185 @@
 # lab4-1_collect_headers.py - Collect and organize HTTP headers from multiple targets
 
 import requests
-import json
+import socket
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlsplit
 
-def collect_headers(urls, output_file="Headers.json"):
-    """Collect headers from multiple URLs and save to JSON."""
+import http_cache
+import http_clients
+from result_sink import ResultSink, completed_keys, segments, to_json
+from result_store import save_run
+
+def target_urls(url):
+    """URLs actually requested for an input: itself, or http:// and https:// for a bare host."""
+    if url.startswith(("http://", "https://")):
+        return [url]
+    return ["http://" + url, "https://" + url]
+
+def fetch(test_url, cache=False, timeout=5, headers_only=False):
+    """GET a URL the way collection does, optionally through the validation cache or HEAD-first."""
+    if headers_only:
+        return http_clients.fetch_headers(test_url, timeout=timeout, verify=False)
+    if cache:
+        return http_cache.cached_get(test_url, timeout=timeout, allow_redirects=True, verify=False)
+    return http_clients.get(test_url, timeout=timeout, allow_redirects=True, verify=False)
+
+def header_record(test_url, r, sent_at=None):
+    """Build the Headers.json record for one response; sent_at is when its request went out."""
+    return {
+        "url": test_url,
+        "status": r.status_code,
+        "final_url": r.url,
+        "server": r.headers.get("Server"),
+        "content_type": r.headers.get("Content-Type"),
+        "content_length": r.headers.get("Content-Length"),
+        "timestamp": datetime.now().isoformat(),
+        "sent_at": sent_at,
+        "headers": dict(r.headers)
+    }
+
+def print_record(result):
+    print(f"  ✓ {result['url']}")
+    print(f"    Status: {result['status']}")
+    print(f"    Server: {result['server'] or '(hidden)'}")
+    print(f"    Content-Type: {result['content_type'] or 'N/A'}")
+
+def _http_attempt(test_url, cache, timeout, headers_only):
+    sent_at, start = time.time(), time.monotonic()
+    try:
+        r = fetch(test_url, cache, timeout, headers_only)
+        return {"target": test_url, "outcome": "ok", "status": r.status_code,
+                "elapsed": round(time.monotonic() - start, 3),
+                "record": header_record(test_url, r, sent_at)}
+    except Exception as e:
+        return {"target": test_url, "outcome": "error", "error": f"{type(e).__name__}: {e}",
+                "elapsed": round(time.monotonic() - start, 3)}
+
+def _connect_attempt(host, port, family, timeout):
+    name = "ipv4" if family == socket.AF_INET else "ipv6"
+    target = f"{name} {host}:{port}"
+    start = time.monotonic()
+    try:
+        address = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)[0][4]
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+        return {"target": target, "outcome": "ok", "address": address[0],
+                "elapsed": round(time.monotonic() - start, 3)}
+    except OSError as e:
+        return {"target": target, "outcome": "error", "error": f"{type(e).__name__}: {e}",
+                "elapsed": round(time.monotonic() - start, 3)}
+
+def race_schemes(url, timeout=5, first_success=False, cache=False, headers_only=False):
+    """
+    Probe a target over http:// and https:// and over IPv4 and IPv6 at the same time.
+    
+    Returns one Headers.json record per scheme that answered (only the first with
+    first_success=True), or a single error record. Every record carries an
+    "attempts" list with the outcome and timing of each probe.
+    """
+    test_urls = target_urls(url)
+    
+    host = urlsplit(test_urls[0]).hostname
+    ports = sorted({urlsplit(u).port or (443 if u.startswith("https://") else 80) for u in test_urls})
     
-    results = []
+    attempts = []
+    records = []
+    pool = ThreadPoolExecutor(max_workers=len(test_urls) + 2 * len(ports))
+    try:
+        futures = [pool.submit(_http_attempt, u, cache, timeout, headers_only) for u in test_urls]
+        futures += [pool.submit(_connect_attempt, host, port, family, timeout)
+                    for port in ports for family in (socket.AF_INET, socket.AF_INET6)]
+        for future in as_completed(futures):
+            attempt = future.result()
+            record = attempt.pop("record", None)
+            attempts.append(attempt)
+            if record:
+                records.append(record)
+                if first_success:
+                    break
+    finally:
+        # Don't wait for slower probes once we have what we need
+        pool.shutdown(wait=not first_success, cancel_futures=True)
+    
+    # Keep records in scheme order (http before https) rather than arrival order
+    records.sort(key=lambda rec: test_urls.index(rec["url"]))
+    if not records:
+        return [{"url": url, "error": "Could not reach URL", "attempts": attempts}]
+    for record in records:
+        record["attempts"] = attempts
+    return records
+
+def latest_records(records):
+    """Log records minus failures that a later (resumed) attempt at the same URL superseded."""
+    records = list(records)
+    reached = {r["url"] for r in records if "error" not in r}
+    last_error = {r["url"]: i for i, r in enumerate(records) if "error" in r}
+    # Failures are logged under the input URL, successes under the URL requested
+    return [r for i, r in enumerate(records)
+            if "error" not in r or (not any(u in reached for u in target_urls(r["url"]))
+                                    and last_error[r["url"]] == i)]
+
+def collect_headers(urls, output_file="Headers.json", cache=False, race=False, first_success=False,
+                    headers_only=False, resume=False):
+    """
+    Collect headers from multiple URLs and save to JSON.
+    
+    cache=True revalidates via http_cache; race=True probes both schemes and
+    address families concurrently (see race_schemes); headers_only=True sends
+    HEAD instead of downloading bodies. Each record is appended to an NDJSON
+    log next to output_file as it arrives and output_file is derived from it;
+    resume=True keeps the log and skips URLs it already has.
+    """
+    
+    log_file = str(Path(output_file).with_suffix(".ndjson"))
+    if not resume:
+        for segment in segments(log_file):
+            Path(segment).unlink()
+    # Only the requested URLs that answered are kept; the records themselves live in the log
+    done = completed_keys(log_file, lambda r: None if "error" in r else r["url"]) - {None}
+    sink = ResultSink(log_file)
+    
+    def record(result):
+        sink.write(result)
+        if "error" not in result:
+            done.add(result["url"])
     
     print("=" * 80)
     print("HTTP Header Collection")
     print("=" * 80)
     
     for url in urls:
+        if any(u in done for u in target_urls(url)):
+            print(f"\nSkipping (already collected): {url}")
+            continue
         print(f"\nFetching: {url}")
         
+        if race:
+            for result in race_schemes(url, first_success=first_success, cache=cache,
+                                       headers_only=headers_only):
+                record(result)
+                if "error" not in result:
+                    print_record(result)
+                    print(f"    Attempts: " + ", ".join(
+                        f"{a['target']} {a['outcome']} ({a['elapsed']}s)" for a in result["attempts"]))
+            continue
+        
         try:
             # Try both HTTP and HTTPS
-            for scheme in ["http://", "https://"]:
-                if not url.startswith(("http://", "https://")):
-                    test_url = scheme + url
-                else:
-                    test_url = url
-                
+            reached = False
+            for test_url in target_urls(url):
                 try:
-                    r = requests.get(test_url, timeout=5, allow_redirects=True, verify=False)
-                    
-                    result = {
-                        "url": test_url,
-                        "status": r.status_code,
-                        "final_url": r.url,
-                        "server": r.headers.get("Server"),
-                        "content_type": r.headers.get("Content-Type"),
-                        "content_length": r.headers.get("Content-Length"),
-                        "timestamp": datetime.now().isoformat(),
-                        "headers": dict(r.headers)
-                    }
-                    
-                    results.append(result)
-                    
-                    print(f"  ✓ {test_url}")
-                    print(f"    Status: {r.status_code}")
-                    print(f"    Server: {r.headers.get('Server', '(hidden)')}")
-                    print(f"    Content-Type: {r.headers.get('Content-Type', 'N/A')}")
+                    sent_at = time.time()
+                    r = fetch(test_url, cache, headers_only=headers_only)
+                    result = header_record(test_url, r, sent_at)
+                    record(result)
+                    print_record(result)
+                    reached = True
                     
                 except requests.exceptions.ConnectionError:
                     pass  # Try next scheme
@@ -55,26 +189,28 @@ def collect_headers(urls, output_file="Headers.json"):
                 except Exception:
                     pass  # Try next scheme
             
-            if not any(result.get("url") == url for result in results):
-                results.append({
+            if not reached:
+                record({
                     "url": url,
                     "error": "Could not reach URL"
                 })
         
         except Exception as e:
-            results.append({
+            record({
                 "url": url,
                 "error": str(e)
             })
     
-    # Save results
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    sink.close()
+    
+    # Save results, derived from the log
+    results = to_json(log_file, output_file, build=latest_records)
+    save_run("collect_headers", ((r["url"], "default", None, r) for r in results))
     
     print(f"\n✓ Headers saved to: {output_file}")
     return results
 
-def main():
+def main(argv=None):
     """Main entry point."""
     
     # Default targets
@@ -90,9 +226,17 @@ def main():
     ]
     
     # Check for command-line arguments
-    if len(sys.argv) > 1:
+    args = sys.argv[1:] if argv is None else argv
+    cache = "--cache" in args
+    race = "--race" in args
+    first_success = "--first" in args
+    headers_only = "--head" in args
+    resume = "--resume" in args
+    args = [a for a in args if a not in ("--cache", "--race", "--first", "--head", "--resume")]
+    
+    if args:
         # Custom URLs provided
-        urls = sys.argv[1:]
+        urls = args
         output = "custom_headers.json"
     else:
         # Use defaults
@@ -100,7 +244,8 @@ def main():
         output = "Headers.json"
     
     # Collect headers
-    results = collect_headers(urls, output)
+    results = collect_headers(urls, output, cache=cache, race=race or first_success,
+                              first_success=first_success, headers_only=headers_only, resume=resume)
     
     # Summary
     print("\n" + "=" * 80)
@@ -3,9 +3,14 @@
 import requests
 import sys
 
-def simple_get(url):
+import http_clients
+
+def simple_get(url, headers_only=False):
     try:
-        r = requests.get(url, timeout=5, allow_redirects=True)
+        if headers_only:
+            r = http_clients.fetch_headers(url, timeout=5)
+        else:
+            r = http_clients.get(url, timeout=5, allow_redirects=True)
         print(f"[+] URL: {url}")
         print(f"    Status Code: {r.status_code}")
         print(f"    Final URL:   {r.url}")
@@ -17,8 +22,13 @@ def simple_get(url):
         print(f"[!] Request error for {url}: {e}")
         return None
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python lab4-1_get.py <url>")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if a != "--head"]
+    if not args:
+        print("Usage: python lab4-1_get.py <url> [--head]")
         sys.exit(1)
-    simple_get(sys.argv[1])
\ No newline at end of file
+    simple_get(args[0], headers_only="--head" in argv)
+
+if __name__ == '__main__':
+    main()
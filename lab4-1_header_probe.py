@@ -2,6 +2,9 @@
 # lab4-1_header_probe.py
 import requests, sys, csv
 
+import http_clients
+from response_stream import read_body
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
     "curl/7.68.0",
@@ -15,26 +18,32 @@ def probe(url, out_csv=None):
     for ua in USER_AGENTS:
         headers = {"User-Agent": ua}
         try:
-            r = requests.get(url, headers=headers, timeout=5)
+            r = http_clients.get(url, headers=headers, timeout=5, stream=True)
+            body = read_body(r, indicators=())
             rows.append({
                 "ua": ua,
                 "status": r.status_code,
                 "server": r.headers.get("Server", ""),
-                "length": len(r.text)
+                "length": body["length"],
+                "truncated": body["truncated"]
             })
         except requests.exceptions.RequestException as e:
             rows.append({"ua": ua, "error": str(e)})
     if out_csv:
         with open(out_csv, "w", newline='') as fh:
-            writer = csv.DictWriter(fh, fieldnames=["ua","status","server","length","error"])
+            writer = csv.DictWriter(fh, fieldnames=["ua","status","server","length","truncated","error"])
             writer.writeheader()
             for r in rows:
                 writer.writerow(r)
     for r in rows:
         print(r)
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
         print("Usage: python lab1_header_probe.py <url> [out.csv]")
         sys.exit(1)
-    probe(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
\ No newline at end of file
+    probe(args[0], args[1] if len(args) > 1 else None)
+
+if __name__ == '__main__':
+    main()
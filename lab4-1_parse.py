@@ -1,35 +1,24 @@
 #!/usr/bin/env python3
 # lab4-1_parse.py
-from bs4 import BeautifulSoup
-import requests, json, sys, urllib.parse
+import json, sys
 
-def parse_page(url, out_file=None):
-    r = requests.get(url, timeout=5)
-    soup = BeautifulSoup(r.text, "html.parser")
+import http_cache
+import http_clients
+from page_analyzer import analyze_page, analyze_urls
+from page_stream import extract_stream
 
-    title = soup.title.string.strip() if soup.title and soup.title.string else None
-    meta = soup.find("meta", attrs={"name": "description"})
-    meta_desc = meta["content"].strip() if meta and meta.get("content") else None
-
-    forms = []
-    for f in soup.find_all("form"):
-        method = f.get("method", "GET").upper()
-        action = urllib.parse.urljoin(url, f.get("action", ""))
-        inputs = []
-        for inp in f.find_all("input"):
-            inputs.append({
-                "name": inp.get("name"),
-                "type": inp.get("type"),
-                "value": inp.get("value")
-            })
-        forms.append({"method": method, "action": action, "inputs": inputs})
-
-    result = {
-        "url": url,
-        "title": title,
-        "meta_description": meta_desc,
-        "forms": forms
-    }
+def parse_page(url, out_file=None, cache=False, streaming=False):
+    if streaming:
+        # Parse chunks as they arrive instead of building a DOM of the whole page;
+        # page_analyzer's extractors need the soup, so this path stays separate
+        with http_clients.get(url, timeout=5, stream=True) as r:
+            result = extract_stream(url, r.iter_content(64 * 1024), r.encoding)
+    else:
+        if cache:
+            r = http_cache.cached_get(url, timeout=5)
+        else:
+            r = http_clients.get(url, timeout=5)
+        result = analyze_page(url, r.content, r.encoding, r.status_code, r.headers, extractors=["page"])
 
     if out_file:
         with open(out_file, "w") as fh:
@@ -37,8 +26,23 @@ def parse_page(url, out_file=None):
     print(json.dumps(result, indent=2))
     return result
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python lab1_parse.py <url> [out_file.json]")
+def parse_pages(urls, out_file=None, cache=False, ordered=True, workers=None):
+    """Fetch many pages concurrently and parse them in a process pool."""
+    results = analyze_urls(urls, extractors=["page"], cache=cache, ordered=ordered, workers=workers, timeout=5)
+    if out_file:
+        with open(out_file, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return results
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python lab1_parse.py <url> [out_file.json] [--cache] [--stream]")
         sys.exit(1)
-    parse_page(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
\ No newline at end of file
+    cache = "--cache" in argv
+    streaming = "--stream" in argv
+    args = [a for a in argv if a not in ("--cache", "--stream")]
+    return parse_page(args[0], args[1] if len(args) > 1 else None, cache=cache, streaming=streaming)
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,64 @@
 #!/usr/bin/env python3
 # lab4-1_report_generator.py - Generate markdown summary from collected data
 
+import hashlib
 import json
 import os
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
 
-def load_json(filename):
-    """Safely load JSON file."""
+from json_stream import iter_records, iter_sites
+from result_store import STORE_FILE, ResultStore
+
+def load_json(filename, shape="list"):
+    """Iterate over the records of a JSON (or NDJSON) results file, or None if it is missing."""
     filepath = Path(f"/workspaces/Lab-4.1/{filename}")
     if filepath.exists():
-        with open(filepath) as f:
-            return json.load(f)
+        return iter_records(str(filepath), shape)
     return None
 
-def generate_headers_summary():
+def _store_records(script):
+    with ResultStore() as store:
+        run_id = store.latest_run(script)
+        if run_id:
+            yield from store.iter_run(run_id)
+
+def load_results(script, filename, shape="nested"):
+    """
+    Records of script's latest run from the result store, else of the JSON file it used to write.
+
+    Records are streamed one at a time either way, each carrying its "site" (and "variation"),
+    and come grouped by site so the summaries can hold one site at a time.
+    """
+    if Path(STORE_FILE).exists():
+        with ResultStore() as store:
+            stored = store.latest_run(script) is not None
+        if stored:
+            return _store_records(script)
+    return load_json(filename, shape)
+
+def _empty(records):
+    """(True, None) if records has nothing in it, else (False, an iterator over all of them)."""
+    if records is None:
+        return True, None
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return True, None
+    return False, chain([first], records)
+
+def generate_headers_summary(data=None):
     """Generate summary from Headers.json"""
-    data = load_json("Headers.json")
-    if not data:
+    if data is None:
+        data = load_results("collect_headers", "Headers.json", shape="list")
+    empty, data = _empty(data)
+    if empty:
         return "No header data found."
     
-    summary = "## Server Headers Summary\n\n"
-    summary += "| URL | Status | Server | Content-Type |\n"
-    summary += "|-----|--------|--------|---------------|\n"
+    lines = ["## Server Headers Summary\n\n"]
+    lines.append("| URL | Status | Server | Content-Type |\n")
+    lines.append("|-----|--------|--------|---------------|\n")
     
     for entry in data:
         url = entry.get('url', 'N/A')
@@ -36,46 +72,51 @@ def generate_headers_summary():
         if content_type and len(content_type) > 30:
             content_type = content_type[:27] + "..."
         
-        summary += f"| {url} | {status} | {server} | {content_type} |\n"
+        lines.append(f"| {url} | {status} | {server} | {content_type} |\n")
     
-    return summary
+    return "".join(lines)
 
-def generate_probe_summary():
+def generate_probe_summary(data=None):
     """Generate summary from header probe results"""
-    data = load_json("header_probe_comparison.json")
-    if not data:
+    if data is None:
+        data = load_results("header_probe_comparison", "header_probe_comparison.json", shape="grouped")
+    empty, data = _empty(data)
+    if empty:
         return "No probe data found."
     
-    summary = "## Header Probe Results\n\n"
-    summary += "**Testing Multiple User-Agents Across Sites**\n\n"
+    lines = ["## Header Probe Results\n\n"]
+    lines.append("**Testing Multiple User-Agents Across Sites**\n\n")
     
-    for site, probes in data.items():
-        summary += f"### {site}\n"
+    for site, probes in iter_sites(data, adjacent=True):
+        lines.append(f"### {site}\n")
         
         if probes and isinstance(probes, list) and len(probes) > 0:
             first = probes[0]
-            summary += f"- Status: {first.get('status', 'N/A')}\n"
-            summary += f"- Server: {first.get('server', '(hidden)')}\n"
-            summary += f"- Length: {first.get('length', 'N/A')} bytes\n"
-        summary += "\n"
+            lines.append(f"- Status: {first.get('status', 'N/A')}\n")
+            lines.append(f"- Server: {first.get('server', '(hidden)')}\n")
+            lines.append(f"- Length: {first.get('length', 'N/A')} bytes\n")
+        lines.append("\n")
     
-    return summary
+    return "".join(lines)
 
-def generate_waf_summary():
+def generate_waf_summary(data=None):
     """Generate WAF detection summary"""
-    data = load_json("advanced_header_fuzzing.json")
-    if not data:
+    if data is None:
+        data = load_results("advanced_header_fuzzing", "advanced_header_fuzzing.json")
+    empty, data = _empty(data)
+    if empty:
         return "No WAF data found."
     
-    summary = "## WAF Detection Results\n\n"
+    lines = ["## WAF Detection Results\n\n"]
     
-    for site, variations in data.items():
-        summary += f"### {site}\n\n"
+    for site, results in iter_sites(data, adjacent=True):
+        lines.append(f"### {site}\n\n")
         
+        variations = {r.get("variation"): r for r in results}
         baseline = variations.get("baseline", {})
         baseline_len = baseline.get("content_length", 0)
         
-        summary += "**Header Variation Tests:**\n\n"
+        lines.append("**Header Variation Tests:**\n\n")
         
         for var_name, var_data in variations.items():
             if var_name == "baseline":
@@ -86,24 +127,27 @@ def generate_waf_summary():
             diff = length - baseline_len
             
             if diff != 0:
-                summary += f"- `{var_name}`: Status {status}, Length {diff:+d} bytes\n"
+                lines.append(f"- `{var_name}`: Status {status}, Length {diff:+d} bytes\n")
         
-        summary += "\n"
+        lines.append("\n")
     
-    return summary
+    return "".join(lines)
 
-def generate_keywords_summary():
+def generate_keywords_summary(data=None):
     """Generate keyword analysis summary"""
-    data = load_json("keyword_results_detailed.json")
-    if not data:
+    if data is None:
+        data = load_json("keyword_results_detailed.json", shape="mapping")
+    empty, data = _empty(data)
+    if empty:
         return "No keyword data found."
     
-    summary = "## Keyword Analysis\n\n"
-    summary += "**Searching for security-related keywords: admin, login, debug, error**\n\n"
-    summary += "| Source | admin | login | debug | error |\n"
-    summary += "|--------|-------|-------|-------|-------|\n"
+    lines = ["## Keyword Analysis\n\n"]
+    lines.append("**Searching for security-related keywords: admin, login, debug, error**\n\n")
+    lines.append("| Source | admin | login | debug | error |\n")
+    lines.append("|--------|-------|-------|-------|-------|\n")
     
-    for source, result in data.items():
+    for result in data:
+        source = result.get("site", "")
         if "error" not in result:
             counts = result.get("keyword_counts", {})
             admin_c = counts.get("admin", 0)
@@ -112,42 +156,14 @@ def generate_keywords_summary():
             error_c = counts.get("error", 0)
             
             source_short = source.replace("/workspaces/Lab-4.1/", "").replace("http://", "").replace("https://", "")
-            summary += f"| {source_short} | {admin_c} | {login_c} | {debug_c} | {error_c} |\n"
+            lines.append(f"| {source_short} | {admin_c} | {login_c} | {debug_c} | {error_c} |\n")
     
-    summary += "\n**Finding**: None of the tested public sites contain these keywords.\n\n"
+    lines.append("\n**Finding**: None of the tested public sites contain these keywords.\n\n")
     
-    return summary
-
-def generate_full_report():
-    """Generate complete markdown report"""
-    report = f"""# Lab 4.1 - HTTP Reconnaissance Report
-**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## Executive Summary
-
-This lab performs passive HTTP reconnaissance on multiple websites to identify:
-- Server technologies and versions
-- Response patterns to different User-Agents
-- WAF (Web Application Firewall) detection mechanisms
-- Content patterns and keywords
+    return "".join(lines)
 
----
-
-"""
-    
-    report += generate_headers_summary()
-    report += "\n---\n\n"
-    
-    report += generate_probe_summary()
-    report += "\n---\n\n"
-    
-    report += generate_keywords_summary()
-    report += "\n---\n\n"
-    
-    report += generate_waf_summary()
-    report += "\n---\n\n"
-    
-    report += """## Key Findings
+# Closing sections, the same for every report
+KEY_FINDINGS = """## Key Findings
 
 ### 1. Server Version Disclosure
 - **scanme.nmap.org**: Apache/2.4.7 (Ubuntu) — Full version exposed
@@ -198,21 +214,118 @@ This lab performs passive HTTP reconnaissance on multiple websites to identify:
 ---
 
 **Lab Status**: ✅ Complete  
-**Last Updated**: {datetime.now().strftime('%Y-%m-%d')}
+**Last Updated**: {date}
+"""
+
+REPORT_FILE = Path("/workspaces/Lab-4.1/lab4-1_ANALYSIS_REPORT.md")
+SECTION_CACHE = Path("/workspaces/Lab-4.1/.report_cache")
+
+# (name, result-store script or None, JSON file, load shape, renderer), in report order
+SECTIONS = [
+    ("headers", "collect_headers", "Headers.json", "list", generate_headers_summary),
+    ("probe", "header_probe_comparison", "header_probe_comparison.json", "grouped", generate_probe_summary),
+    ("keywords", None, "keyword_results_detailed.json", "mapping", generate_keywords_summary),
+    ("waf", "advanced_header_fuzzing", "advanced_header_fuzzing.json", "nested", generate_waf_summary),
+]
+
+def input_fingerprint(script, filename, store=None):
+    """
+    Cheap identity of a section's input: the script's latest run id and the
+    JSON file's size and mtime. The data itself is only loaded when this changes.
+    """
+    parts = []
+    if script and store:
+        parts.append(f"run:{store.latest_run(script)}")
+    path = Path(f"/workspaces/Lab-4.1/{filename}")
+    if path.exists():
+        st = path.stat()
+        parts.append(f"file:{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts) or "missing"
+
+def _code_version():
+    # Editing this script invalidates every cached section
+    with open(__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def section_texts(cache_dir=SECTION_CACHE, regenerated=None):
+    """
+    Yield (name, markdown) for each section, reusing cached text whose input is unchanged.
+
+    Names of the sections that had to be rebuilt are appended to regenerated.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_path = cache_dir / "index.json"
+    try:
+        index = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        index = {}
+    version = _code_version()
+    if index.get("_version") != version:
+        index = {"_version": version}
+
+    store = ResultStore() if Path(STORE_FILE).exists() else None
+    try:
+        for name, script, filename, shape, render in SECTIONS:
+            fingerprint = input_fingerprint(script, filename, store)
+            cached = cache_dir / f"{name}.md"
+            if index.get(name) == fingerprint and cached.exists():
+                yield name, cached.read_text()
+                continue
+            data = load_results(script, filename, shape) if script else load_json(filename, shape)
+            text = render(data)
+            cached.write_text(text)
+            index[name] = fingerprint
+            if regenerated is not None:
+                regenerated.append(name)
+            yield name, text
+    finally:
+        if store:
+            store.close()
+        index_path.write_text(json.dumps(index, indent=2))
+
+def iter_report(cache_dir=SECTION_CACHE, regenerated=None):
+    """The report as a sequence of markdown chunks."""
+    yield f"""# Lab 4.1 - HTTP Reconnaissance Report
+**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+## Executive Summary
+
+This lab performs passive HTTP reconnaissance on multiple websites to identify:
+- Server technologies and versions
+- Response patterns to different User-Agents
+- WAF (Web Application Firewall) detection mechanisms
+- Content patterns and keywords
+
+---
+
 """
     
-    return report
+    for name, text in section_texts(cache_dir, regenerated):
+        yield text
+        yield "\n---\n\n"
+    
+    yield KEY_FINDINGS.format(date=datetime.now().strftime('%Y-%m-%d'))
+
+def generate_full_report():
+    """Generate complete markdown report"""
+    return "".join(iter_report())
 
 def main():
-    """Generate and save report."""
-    report = generate_full_report()
-    
-    output_file = Path("/workspaces/Lab-4.1/lab4-1_ANALYSIS_REPORT.md")
-    with open(output_file, "w") as f:
-        f.write(report)
+    """Generate and save report, rebuilding only sections whose inputs changed."""
+    output_file = REPORT_FILE
+    regenerated = []
+    words = 0
+    tmp = output_file.with_name(output_file.name + ".tmp")
+    with open(tmp, "w") as f:
+        for chunk in iter_report(regenerated=regenerated):
+            f.write(chunk)
+            words += len(chunk.split())
+    os.replace(tmp, output_file)
     
     print(f"✓ Report generated: {output_file}")
-    print(f"✓ Word count: {len(report.split())}")
+    print(f"✓ Sections regenerated: {', '.join(regenerated) or 'none (all cached)'}")
+    print(f"✓ Word count: {words}")
 
 if __name__ == "__main__":
     main()
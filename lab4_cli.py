@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# lab4_cli.py - Single entry point for the lab scripts: python lab4_cli.py <command> [args...]
+
+import sys
+from importlib import import_module
+
+# command: (module, description). Modules are imported only when their command
+# runs, so e.g. `report` never pays for requests/bs4 and `--help` loads nothing.
+COMMANDS = {
+    "get": ("lab4-1_get", "Status and headers of one URL: get <url> [--head]"),
+    "probe": ("lab4-1_header_probe", "Probe a URL with several User-Agents: probe <url> [out.csv]"),
+    "collect": ("lab4-1_collect_headers", "Collect server headers: collect [urls...] [--cache] [--race] [--first] "
+                                          "[--head] [--resume]"),
+    "parse": ("lab4-1_parse", "Extract forms and metadata: parse <url> [out.json] [--cache] [--stream]"),
+    "keywords": ("keyword_compare", "Compare keyword counts across the test sites: keywords [--index]"),
+    "keywords-local": ("keyword_compare_local", "Keyword counts for local files and sites: keywords-local "
+                                                "[--raw] [--skip-scripts] | --corpus [--raw] [--out f] <dir|glob>"),
+    "compare": ("header_probe_comparison", "Compare responses to several User-Agents across the test sites"),
+    "ua": ("user_agent_analysis", "curl/sqlmap/Nikto differences in the probe results: ua [results.json]"),
+    "fuzz": ("header_fuzzing", "Header fuzzing against the test sites: fuzz [--resume] [--advanced]"),
+    "waf": ("waf_detection", "WAF/bot protection detection against the WAF test sites"),
+    "waf-report": ("waf_findings_report", "Print the WAF detection & header fuzzing findings report"),
+    "report": ("lab4-1_report_generator", "Regenerate the markdown analysis report"),
+}
+
+def usage():
+    print("Usage: python lab4_cli.py <command> [args...]\n\nCommands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:14} {description}")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        usage()
+        return 0
+    name, args = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n")
+        usage()
+        return 1
+    module = COMMANDS[name][0]
+    if name == "fuzz" and "--advanced" in args:
+        module = "advanced_header_fuzzing"
+        args = [a for a in args if a != "--advanced"]
+    # Scripts still read their own options from sys.argv when run directly
+    sys.argv = [f"lab4_cli.py {name}", *args]
+    import_module(module).main()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# page_analyzer.py - One parse per page: forms, keywords and WAF indicators together
+
+import json
+import sys
+from functools import cached_property, partial
+
+from html_analysis import extract_from_soup, get_matcher, make_soup, text_from_soup
+from waf_signatures import default_signatures
+
+DEFAULT_KEYWORDS = ("admin", "login", "debug", "error")
+
+# name -> function(page) returning a dict merged into the page's result
+EXTRACTORS = {}
+# Extractors only run when asked for by name
+OPT_IN = set()
+
+
+def register_extractor(name, default=True):
+    """
+    Decorator adding an extractor; it receives a Page and returns a dict of fields.
+
+    With default=False it only runs when named in the extractors list.
+    """
+    def decorator(func):
+        EXTRACTORS[name] = func
+        if not default:
+            OPT_IN.add(name)
+        return func
+    return decorator
+
+
+class Page:
+    """
+    One fetched page, with each derived view built at most once.
+
+    The soup, the visible text and the raw body bytes are computed on first use
+    and shared by every extractor, so a page is parsed and scanned once no
+    matter how many extractors run.
+    """
+
+    def __init__(self, url, content, encoding=None, status=None, headers=None,
+                 keywords=DEFAULT_KEYWORDS, whole_word=False):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.status = status
+        self.headers = headers or {}
+        self.keywords = tuple(keywords)
+        self.whole_word = whole_word
+
+    @cached_property
+    def soup(self):
+        return make_soup(self.content, self.encoding)
+
+    @cached_property
+    def text(self):
+        return text_from_soup(self.soup)
+
+    @cached_property
+    def body(self):
+        if isinstance(self.content, str):
+            return self.content.encode(self.encoding or "utf-8", "replace")
+        return self.content
+
+
+@register_extractor("page")
+def _extract_page(page):
+    fields = extract_from_soup(page.url, page.soup)
+    del fields["url"]
+    return fields
+
+
+@register_extractor("keywords")
+def _extract_keywords(page):
+    return {
+        "text_length": len(page.text),
+        "keyword_counts": get_matcher(page.keywords, page.whole_word).count(page.text),
+    }
+
+
+@register_extractor("text", default=False)
+def _extract_text(page):
+    # The whole visible text, e.g. for text_index
+    return {"text": page.text}
+
+
+@register_extractor("waf")
+def _extract_waf(page):
+    # Signatures are matched against the status, the response headers and the
+    # raw markup (scripts and attributes included)
+    waf = default_signatures().classify(page.status, page.headers, page.body)
+    return {"waf_indicators": waf["matches"], "waf_vendor": waf["vendor"], "waf_score": waf["score"]}
+
+
+def analyze_page(url, content, encoding=None, status=None, headers=None, extractors=None, **options):
+    """
+    Run the selected extractors (default: all but the opt-in ones) over one page.
+
+    options (keywords, whole_word) are passed to Page. Returns a
+    single dict with the url and every extractor's fields.
+    """
+    page = Page(url, content, encoding, status, headers, **options)
+    return {"url": url, **run_extractors(page, extractors)}
+
+
+def run_extractors(page, extractors=None):
+    """Fields from the selected extractors (default: all but the opt-in ones) for an existing Page."""
+    result = {}
+    for name in extractors or [name for name in EXTRACTORS if name not in OPT_IN]:
+        result.update(EXTRACTORS[name](page))
+    return result
+
+
+def _analyze_fetched(url, content, encoding, status=None, headers=None, extractors=None, **options):
+    page = Page(url, content, encoding, status, headers, **options)
+    return run_extractors(page, extractors)
+
+
+def analyze_urls(urls, extractors=None, on_result=None, cache=False, ordered=True, workers=None,
+                 timeout=10, **options):
+    """
+    Fetch pages concurrently and analyse each once in the process pool.
+
+    Each page is analysed with its response status and headers, so header
+    and status WAF signatures fire here as they do for a probed response.
+    on_result(url, result) is called as results come in (see run_pipeline).
+    """
+    from analysis_pipeline import run_pipeline
+
+    analyze = partial(_analyze_fetched, extractors=extractors, **options)
+    return [{"url": url, **result}
+            for url, result in run_pipeline(urls, analyze, on_result=on_result, ordered=ordered,
+                                            workers=workers, timeout=timeout, cache=cache,
+                                            with_response=True)]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python page_analyzer.py <url> [url ...]")
+        sys.exit(1)
+    print(json.dumps(analyze_urls(sys.argv[1:]), indent=2))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# page_stream.py - Single-pass streaming title/meta/form extraction without a DOM
+
+import codecs
+import urllib.parse
+from html.parser import HTMLParser
+
+# Elements BeautifulSoup's html.parser builder closes as soon as they open
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta",
+    "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex",
+    "nextid", "spacer",
+})
+
+
+class PageExtractor(HTMLParser):
+    """
+    Event-driven version of html_analysis.extract_page.
+
+    Feed it chunks as they arrive (feed() for str, feed_bytes() for raw
+    bytes) and call result() at the end. Only the stack of open tag names,
+    the forms currently open and the first title's content are held while
+    parsing; nothing else of the page is kept.
+
+    Results follow the tree BeautifulSoup builds with html.parser: an end
+    tag closes everything opened after the matching start tag (so </div>
+    also closes a form opened inside it), and the title is the text of the
+    first <title> only when it has a single text node (title.string).
+    """
+
+    def __init__(self, url, encoding=None):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        self.title = None
+        self.meta_description = None
+        self.forms = []
+        self._stack = []            # names of the open elements
+        self._closed_void = []      # void elements closed at their start tag
+        self._open_forms = []       # (stack depth, form) for forms still open
+        self._title_at = None       # stack depth of the first <title> while it is open
+        self._title_levels = []     # open elements inside the title, see _title_child()
+        self._title_text = False    # last thing seen in the title was text
+        self._title_mixed = False   # some element in the title has more than one child
+        self._title_done = False
+        self._meta_done = False
+
+    def feed(self, data):
+        # NUL characters are dropped, as html_analysis.strip_nul does before parsing
+        super().feed(data.replace("\x00", "") if "\x00" in data else data)
+
+    def feed_bytes(self, chunk):
+        self.feed(self._decoder.decode(chunk))
+
+    @staticmethod
+    def _attr(attrs, name, default=None):
+        # The last duplicate wins, and valueless attributes (<input disabled>)
+        # come through as None; BeautifulSoup gives ""
+        for key, value in reversed(attrs):
+            if key == name:
+                return "" if value is None else value
+        return default
+
+    # Title content is tracked only as far as title.string needs: each level
+    # is [child_count, only_child], a child being ("text", [parts]) or
+    # ("tag", level). Once any level has a second child the title is None.
+
+    def _title_child(self, child):
+        level = self._title_levels[-1]
+        level[0] += 1
+        if level[0] > 1:
+            self._title_mixed = True
+        else:
+            level[1] = child
+
+    def _title_node(self, data):
+        """Text, a comment or a CDATA section inside the title."""
+        if self._title_mixed:
+            return
+        if self._title_text:
+            self._title_levels[-1][1][1].append(data)
+        else:
+            self._title_child(("text", [data]))
+        self._title_text = True
+
+    def _finish_title(self):
+        node = None if self._title_mixed else ("tag", self._title_levels[0])
+        while node and node[0] == "tag":
+            count, child = node[1]
+            node = child if count == 1 else None
+        text = "".join(node[1]) if node else None
+        self.title = text.strip() if text else None
+        self._title_at = None
+        self._title_levels = []
+        self._title_done = True
+
+    def _pop_to(self, depth):
+        """Close every element from stack position depth up."""
+        del self._stack[depth:]
+        while self._open_forms and self._open_forms[-1][0] >= depth:
+            self._open_forms.pop()
+        if self._title_at is not None:
+            if depth <= self._title_at:
+                self._finish_title()
+            else:
+                del self._title_levels[depth - self._title_at:]
+                self._title_text = False
+
+    def _start(self, tag, attrs):
+        if self._title_at is not None:
+            level = [0, None]
+            self._title_child(("tag", level))
+            self._title_text = False
+            self._title_levels.append(level)
+
+        if tag == "title" and not self._title_done and self._title_at is None:
+            self._title_at = len(self._stack)
+            self._title_levels = [[0, None]]
+            self._title_text = False
+        elif tag == "meta" and not self._meta_done:
+            if self._attr(attrs, "name") == "description":
+                self._meta_done = True
+                content = self._attr(attrs, "content")
+                self.meta_description = content.strip() if content else None
+        elif tag == "form":
+            form = {
+                "method": self._attr(attrs, "method", "GET").upper(),
+                "action": urllib.parse.urljoin(self.url, self._attr(attrs, "action", "")),
+                "inputs": [],
+            }
+            # Listed at the start tag so the order matches document order
+            self.forms.append(form)
+            self._open_forms.append((len(self._stack), form))
+        elif tag == "input" and self._open_forms:
+            field = {
+                "name": self._attr(attrs, "name"),
+                "type": self._attr(attrs, "type"),
+                "value": self._attr(attrs, "value"),
+            }
+            # A nested form's inputs also belong to every enclosing form
+            for _, form in self._open_forms:
+                form["inputs"].append(field)
+
+        self._stack.append(tag)
+
+    def _end(self, tag):
+        # An end tag with no matching open element closes nothing but still
+        # ends the current text node
+        self._title_text = False
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth] == tag:
+                self._pop_to(depth)
+                return
+
+    # The three tag handlers follow BeautifulSoupHTMLParser: a void element
+    # is closed as soon as it opens and a later end tag of the same name
+    # (</input>) is then skipped, while <x/> opens and closes x without
+    # touching that list.
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._end(tag)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs)
+        self._end(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+        else:
+            self._end(tag)
+
+    def handle_data(self, data):
+        if self._title_at is not None:
+            self._title_node(data)
+
+    def handle_comment(self, data):
+        # Comments, CDATA sections, declarations and PIs are nodes of their own
+        if self._title_at is not None:
+            self._title_text = False
+            self._title_node(data)
+            self._title_text = False
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            data = data[len("CDATA["):]
+        self.handle_comment(data)
+
+    def handle_decl(self, decl):
+        self.handle_comment(decl[len("DOCTYPE "):] if decl.startswith("DOCTYPE ") else decl)
+
+    def handle_pi(self, data):
+        self.handle_comment(data)
+
+    def result(self):
+        """Finish parsing and return the extract_page-shaped result."""
+        self.feed(self._decoder.decode(b"", final=True))
+        self.close()
+        if self._title_at is not None:
+            self._finish_title()
+        self._stack = []
+        self._closed_void = []
+        self._open_forms = []
+        return {
+            "url": self.url,
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "forms": self.forms
+        }
+
+
+def extract_stream(url, chunks, encoding=None):
+    """Run PageExtractor over an iterable of byte chunks (e.g. r.iter_content())."""
+    extractor = PageExtractor(url, encoding)
+    for chunk in chunks:
+        extractor.feed_bytes(chunk)
+    return extractor.result()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# probe_engine.py - Concurrent probe engine shared by the multi-site scripts
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import http_clients
+from rate_limit import THROTTLE_STATUSES
+
+DEFAULT_CONCURRENCY = 32   # requests in flight across all hosts
+DEFAULT_PER_HOST = 4       # requests in flight against any single host
+
+
+def default_error(job, exc):
+    """Default error record: the failing URL and the error message."""
+    return {"url": job[0], "error": str(exc)}
+
+
+def _fetch(url, headers, timeout, verify, stream, allow_redirects=True):
+    return http_clients.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects,
+                            verify=verify, stream=stream)
+
+
+_THROTTLED = object()   # _probe result meaning "throttled, try again after backing off"
+
+
+def _probe(job, handle, on_error, timeout, verify, stream, limiter=None, retry_throttled=False,
+           allow_redirects=True, on_result=None):
+    """Fetch one job and build its result (runs in a worker thread)."""
+    url, headers = job[0], job[1]
+    sent_at = time.time()
+    try:
+        r = _fetch(url, headers, timeout, verify, stream, allow_redirects)
+        try:
+            if limiter:
+                limiter.record(_host(url), r.status_code, r.headers.get("Retry-After"))
+                if retry_throttled and r.status_code in THROTTLE_STATUSES:
+                    return _THROTTLED
+            result = handle(job, r)
+        finally:
+            r.close()
+    except Exception as e:
+        result = on_error(job, e)
+    if isinstance(result, dict):
+        result.setdefault("sent_at", sent_at)
+    if on_result:
+        on_result(job, result)
+    return result
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+async def probe_all(jobs, handle, on_error=default_error, concurrency=DEFAULT_CONCURRENCY,
+                    per_host=DEFAULT_PER_HOST, timeout=5, verify=True, stream=False,
+                    limiter=None, retries=0, allow_redirects=True, on_result=None):
+    """Run jobs concurrently with a global and a per-host cap; results keep job order."""
+    loop = asyncio.get_running_loop()
+    global_sem = asyncio.Semaphore(concurrency)
+    host_sems = {}
+
+    async def run(job):
+        host = _host(job[0])
+        host_sem = host_sems.setdefault(host, asyncio.Semaphore(per_host))
+        # Take the host slot first so jobs queued behind a busy host don't hold global slots
+        async with host_sem:
+            for attempt in range(retries + 1):
+                if limiter:
+                    await limiter.wait(host)
+                async with global_sem:
+                    result = await loop.run_in_executor(
+                        pool, _probe, job, handle, on_error, timeout, verify, stream,
+                        limiter, attempt < retries, allow_redirects, on_result)
+                if result is not _THROTTLED:
+                    return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return await asyncio.gather(*(run(job) for job in jobs))
+
+
+def run_probes(jobs, handle, on_error=default_error, concurrency=DEFAULT_CONCURRENCY,
+               per_host=DEFAULT_PER_HOST, timeout=5, verify=True, stream=False,
+               limiter=None, retries=0, allow_redirects=True, on_result=None):
+    """
+    Probe a list of jobs and return one result per job, in job order.
+
+    Each job is a tuple whose first two items are (url, headers); any extra items
+    are passed through untouched. handle(job, response) builds the result dict for
+    a successful request and on_error(job, exception) builds it for a failure.
+    With stream=True the body is left unread for handle() to consume (see
+    response_stream.read_body); the response is closed once handle() returns.
+    With a rate_limit.HostRateLimiter every request waits for its host's token
+    and reports its status back; a throttled (429/503) response is retried up to
+    `retries` times after the limiter's backoff before it is handed to handle().
+    With allow_redirects=False a 3xx response is handed to handle() as it is.
+    Result dicts get "sent_at", the time.time() their (last) request went out,
+    and on_result(job, result) is called with each final result in its worker
+    thread as soon as it is built, e.g. to log it before the run finishes.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    return asyncio.run(probe_all(jobs, handle, on_error, concurrency, per_host, timeout, verify,
+                                 stream, limiter, retries, allow_redirects, on_result))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# rate_limit.py - Per-host adaptive rate limiting with 429/503-aware backoff
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+class HostRateLimiter:
+    """
+    Token bucket per host whose rate adapts to how the host responds.
+
+    Every throttled response (429/503) multiplies the host's rate by
+    `decrease` and pauses it for Retry-After seconds (or one token interval
+    when the header is missing); every other response adds `increase`
+    requests/second back, up to max_rate (AIMD). Safe to share between the
+    event loop and worker threads.
+    """
+
+    def __init__(self, rate=5.0, burst=5, min_rate=0.2, max_rate=50.0,
+                 increase=0.5, decrease=0.5, max_retry_after=120.0):
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retry_after = max_retry_after
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host, now):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {"rate": self.initial_rate, "tokens": float(self.burst),
+                                         "updated": now, "ok": 0, "throttled": 0,
+                                         "max_rate": self.max_rate}
+        return state
+
+    def limit(self, host, max_rate):
+        """Cap host at max_rate requests/second (e.g. from a robots.txt Crawl-delay)."""
+        with self._lock:
+            state = self._state(host, time.monotonic())
+            state["max_rate"] = min(self.max_rate, max_rate)
+            state["rate"] = min(state["rate"], state["max_rate"])
+
+    def reserve(self, host):
+        """Take a token for host and return how many seconds to wait before using it."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host, now)
+            if now > state["updated"]:
+                state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * state["rate"])
+                state["updated"] = now
+            state["tokens"] -= 1
+            delay = max(0.0, state["updated"] - now)
+            if state["tokens"] < 0:
+                delay += -state["tokens"] / state["rate"]
+            return delay
+
+    async def wait(self, host):
+        """Wait (without blocking the event loop) until host may be sent another request."""
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait_blocking(self, host):
+        """Thread version of wait()."""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, host, status, retry_after=None):
+        """Feed back a response status (and its Retry-After header) for host."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host, now)
+            if status in THROTTLE_STATUSES:
+                state["throttled"] += 1
+                state["rate"] = min(state["max_rate"], max(self.min_rate, state["rate"] * self.decrease))
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = 1.0 / state["rate"]
+                # Nothing refills until the pause is over
+                state["updated"] = max(state["updated"], now + min(pause, self.max_retry_after))
+                state["tokens"] = min(state["tokens"], 0.0)
+            else:
+                state["ok"] += 1
+                state["rate"] = min(state["max_rate"], state["rate"] + self.increase)
+
+    def summary(self):
+        """Current rate and ok/throttled response counts per host."""
+        with self._lock:
+            return {host: {"rate": round(s["rate"], 2), "ok": s["ok"], "throttled": s["throttled"]}
+                    for host, s in self._hosts.items()}
+
+
+def print_rate_limits(limiter):
+    """Show hosts that throttled us and how far the limiter backed off."""
+    for host, stats in limiter.summary().items():
+        if stats["throttled"]:
+            print(f"  ⏳ {host}: {stats['throttled']} throttled / {stats['ok']} ok responses, "
+                  f"now {stats['rate']} req/s")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# response_stream.py - Streaming response body analysis with a byte cap
+
+import hashlib
+
+from fingerprint import Fingerprinter
+
+DEFAULT_INDICATORS = ("blocked", "challenge", "access denied", "cloudflare")
+MAX_BODY_BYTES = 2 * 1024 * 1024   # stop downloading after this many bytes (None = no cap)
+CHUNK_SIZE = 64 * 1024
+
+
+def read_body(r, max_bytes=MAX_BODY_BYTES, indicators=DEFAULT_INDICATORS, chunk_size=CHUNK_SIZE,
+              fingerprint=False, waf=None, archive=None, archive_base=None):
+    """
+    Read a response opened with stream=True chunk by chunk without keeping the body.
+
+    Returns a dict with the body length in bytes, its SHA-256, whether each
+    indicator string appeared (case-insensitive) and whether the download was
+    cut off at max_bytes. With fingerprint=True it also carries a similarity
+    sketch (see fingerprint.py), whose digest is the same SHA-256. With waf (a compiled
+    waf_signatures.WafSignatures) it also carries the response's WAF verdict,
+    scored in the same pass. With archive (a body_archive.BodyArchive) the
+    body read is stored there, delta-compressed against archive_base if
+    given, and body_ref holds its digest. The response is closed afterwards.
+    """
+    fp = Fingerprinter() if fingerprint else None
+    # The fingerprinter already hashes every byte; only hash here without it
+    digest = None if fp else hashlib.sha256()
+    waf_scan = waf.scanner() if waf else None
+    kept = [] if archive else None
+    needles = {ind: ind.lower().encode() for ind in indicators}
+    found = set()
+    # Carry the end of each chunk over so matches spanning two chunks are seen
+    overlap = max((len(n) for n in needles.values()), default=1) - 1
+    tail = b""
+    length = 0
+    truncated = False
+
+    try:
+        for chunk in r.iter_content(chunk_size):
+            if max_bytes is not None and length + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - length]
+                truncated = True
+            length += len(chunk)
+            if fp:
+                fp.update(chunk)
+            else:
+                digest.update(chunk)
+            if waf_scan:
+                waf_scan.update(chunk)
+            if kept is not None:
+                kept.append(chunk)
+
+            if len(found) < len(needles):
+                window = tail + chunk.lower()
+                for ind, needle in needles.items():
+                    if ind not in found and needle in window:
+                        found.add(ind)
+                tail = window[-overlap:] if overlap else b""
+
+            if truncated:
+                break
+    finally:
+        r.close()
+
+    fp_result = fp.result() if fp else None
+    result = {
+        "length": length,
+        "sha256": fp_result["digest"] if fp else digest.hexdigest(),
+        "truncated": truncated,
+        "indicators": {ind: ind in found for ind in indicators},
+    }
+    if fp:
+        result["fingerprint"] = fp_result
+    if waf_scan:
+        result["waf"] = waf.score(r.status_code, r.headers, waf_scan.found)
+    if kept is not None:
+        result["body_ref"] = archive.put(b"".join(kept), archive_base, key=result["sha256"])
+    return result
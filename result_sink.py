@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# result_sink.py - Append-only NDJSON result log with periodic fsync and rotation
+
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+FSYNC_EVERY = 50                  # records between fsyncs
+FSYNC_INTERVAL = 5.0              # ...or seconds, whichever comes first
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def segments(path):
+    """Files holding path's records, oldest first: rotated path.1, path.2, ... then path."""
+    rotated = []
+    for name in glob.glob(glob.escape(path) + ".*"):
+        m = re.fullmatch(re.escape(path) + r"\.(\d+)", name)
+        if m:
+            rotated.append((int(m.group(1)), name))
+    files = [name for _, name in sorted(rotated)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def iter_records(path):
+    """
+    Yield every record written to path (all segments), oldest first.
+
+    A torn last line, left by a crash in the middle of a write, is skipped.
+    """
+    for segment in segments(path):
+        with open(segment, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.endswith("\n"):
+                    break
+                if line.strip():
+                    yield json.loads(line)
+
+
+def completed_keys(path, key):
+    """Set of key(record) over everything already written, for resuming a run."""
+    return {key(record) for record in iter_records(path)}
+
+
+def to_json(path, out_file, build=list):
+    """Derive a pretty JSON file from the log: build(records) gives the object to dump."""
+    data = build(iter_records(path))
+    with open(out_file, "w") as fh:
+        json.dump(data, fh, indent=2)
+    return data
+
+
+class ResultSink:
+    """
+    Thread-safe append-only writer of one compact JSON record per line.
+
+    Each record is flushed as it is written and fsynced every fsync_every
+    records or fsync_interval seconds, so a crash or Ctrl-C loses at most
+    the last few unsynced records and never the run. The active file is
+    rotated to path.N once it passes max_bytes. Opening an existing path
+    appends to it (after dropping a torn last line), so a restarted run can
+    skip what completed_keys() reports and carry on.
+    """
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL,
+                 max_bytes=MAX_SEGMENT_BYTES):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self._repair()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def _repair(self):
+        """Cut a partial last line left behind by an interrupted write."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            fh.seek(max(0, size - 65536))
+            tail = fh.read()
+            if tail.endswith(b"\n"):
+                return
+            cut = tail.rfind(b"\n")
+            if cut < 0 and size > len(tail):
+                # Last line longer than the tail read; fall back to a full scan
+                fh.seek(0)
+                data = fh.read()
+                fh.truncate(data.rfind(b"\n") + 1)
+            else:
+                fh.truncate(size - len(tail) + cut + 1)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._synced_at >= self.fsync_interval):
+                self._sync()
+            if self.max_bytes and self._fh.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _sync(self):
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def _rotate(self):
+        self._sync()
+        self._fh.close()
+        rotated = [s for s in segments(self.path) if s != self.path]
+        number = int(rotated[-1].rsplit(".", 1)[1]) + 1 if rotated else 1
+        os.replace(self.path, f"{self.path}.{number}")
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.flush()
+                self._sync()
+                self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python result_sink.py results.ndjson [out.json] : count records or convert them to pretty JSON
+    if len(sys.argv) < 2:
+        print("Usage: python result_sink.py <results.ndjson> [out.json]")
+        sys.exit(1)
+    if len(sys.argv) > 2:
+        records = to_json(sys.argv[1], sys.argv[2])
+        print(f"✓ {len(records)} records written to {sys.argv[2]}")
+    else:
+        count = sum(1 for _ in iter_records(sys.argv[1]))
+        print(f"{count} records in {len(segments(sys.argv[1]))} segment(s)")
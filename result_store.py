@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# result_store.py - SQLite store of probe runs shared by the probe scripts and reports
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+
+from body_archive import BodyArchive
+
+# LAB4_RESULTS_DB in the environment points every script at another store
+STORE_FILE = os.environ.get("LAB4_RESULTS_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "results.db")
+BATCH_SIZE = 500   # records buffered before they are written in one transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS runs_script ON runs(script, started);
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    site TEXT UNIQUE NOT NULL,
+    host TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS targets_host ON targets(host);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    target_id INTEGER NOT NULL REFERENCES targets(id),
+    variation TEXT NOT NULL,          -- User-Agent or header variation name
+    headers TEXT,                     -- request headers sent (JSON)
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_lookup ON requests(target_id, variation, run_id, sent_at);
+-- iter_run reads a run one target at a time; the rowid tail of the index keeps request order
+DROP INDEX IF EXISTS requests_run;
+CREATE INDEX IF NOT EXISTS requests_run_target ON requests(run_id, target_id);
+CREATE TABLE IF NOT EXISTS responses (
+    request_id INTEGER PRIMARY KEY REFERENCES requests(id),
+    status INTEGER,
+    length INTEGER,
+    server TEXT,
+    content_type TEXT,
+    error TEXT,
+    headers TEXT,                     -- response headers (JSON), from the record or its headers_ref
+    data TEXT NOT NULL                -- the script's full result record (JSON)
+);
+CREATE INDEX IF NOT EXISTS responses_server ON responses(server);
+"""
+
+
+def _first(record, *keys):
+    for key in keys:
+        if record.get(key) is not None:
+            return record[key]
+    return None
+
+
+def _response_headers(record, archive):
+    """A record's response headers, read from the body archive when it only keeps headers_ref."""
+    headers = record.get("headers") or record.get("response_headers")
+    if headers is None and record.get("headers_ref"):
+        try:
+            headers = archive.get_headers(record["headers_ref"])
+        except (OSError, ValueError):
+            pass
+    return headers
+
+
+def _header(headers, name):
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+class ResultStore:
+    """
+    Runs, targets, requests and responses in one SQLite file.
+
+    Scripts open a run, record() each probe (buffered and written BATCH_SIZE
+    at a time in a single transaction) and finish the run. Reports read a
+    run back in the shape the scripts used to dump as JSON (run_results), and
+    cross-run questions such as header_history() are index lookups.
+    """
+
+    def __init__(self, path=STORE_FILE, archive=None):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.archive = archive or BodyArchive()
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._targets = {}
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, script):
+        with self._lock, self.db:
+            return self.db.execute("INSERT INTO runs (script, started) VALUES (?, ?)",
+                                   (script, time.time())).lastrowid
+
+    def finish_run(self, run_id):
+        self.flush()
+        with self._lock, self.db:
+            self.db.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+
+    def record(self, run_id, site, variation, result, request_headers=None, sent_at=None):
+        """
+        Buffer one probe result; safe to call from worker threads.
+
+        sent_at is when the request went out (time.time()); it defaults to now.
+        """
+        sent_at = time.time() if sent_at is None else sent_at
+        with self._lock:
+            self._pending.append((run_id, site, variation, request_headers, result, sent_at))
+            full = len(self._pending) >= BATCH_SIZE
+        if full:
+            self.flush()
+
+    def _target_id(self, site):
+        target_id = self._targets.get(site)
+        if target_id is None:
+            host = urllib.parse.urlsplit(site).hostname or site
+            self.db.execute("INSERT OR IGNORE INTO targets (site, host) VALUES (?, ?)", (site, host))
+            target_id = self.db.execute("SELECT id FROM targets WHERE site = ?", (site,)).fetchone()[0]
+            self._targets[site] = target_id
+        return target_id
+
+    def flush(self):
+        """Write buffered records in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            with self.db:
+                for run_id, site, variation, request_headers, result, sent_at in pending:
+                    request_id = self.db.execute(
+                        "INSERT INTO requests (run_id, target_id, variation, headers, sent_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (run_id, self._target_id(site), variation,
+                         json.dumps(request_headers) if request_headers is not None else None, sent_at),
+                    ).lastrowid
+                    headers = _response_headers(result, self.archive)
+                    self.db.execute(
+                        "INSERT INTO responses (request_id, status, length, server, content_type, error, "
+                        "headers, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (request_id,
+                         result.get("status") if isinstance(result.get("status"), int) else None,
+                         _first(result, "length", "content_length"),
+                         _first(result, "server") or _header(headers, "Server"),
+                         _first(result, "content_type") or _header(headers, "Content-Type"),
+                         result.get("error"),
+                         json.dumps(headers, default=str) if headers is not None else None,
+                         json.dumps(result, default=str)))
+
+    def latest_run(self, script):
+        """Id of the most recent finished run of script, or None."""
+        row = self.db.execute(
+            "SELECT id FROM runs WHERE script = ? AND finished IS NOT NULL ORDER BY started DESC LIMIT 1",
+            (script,)).fetchone()
+        return row[0] if row else None
+
+    def iter_run(self, run_id):
+        """
+        Yield a run's records one at a time, grouped by target, in request order within each.
+
+        Each record gets the "site" and "variation" it was stored under, when not already set.
+        Grouping lets readers take one site at a time (json_stream.iter_sites(adjacent=True)).
+        """
+        rows = self.db.execute(
+            "SELECT t.site, q.variation, r.data FROM requests q JOIN targets t ON t.id = q.target_id "
+            "JOIN responses r ON r.request_id = q.id WHERE q.run_id = ? ORDER BY q.target_id, q.id", (run_id,))
+        for site, variation, data in rows:
+            record = json.loads(data)
+            record.setdefault("site", site)
+            record.setdefault("variation", variation)
+            yield record
+
+    def run_results(self, run_id, shape="nested"):
+        """
+        A run's records, in request order, shaped like the JSON the script wrote.
+
+        shape="nested": {site: {variation: record}}; "grouped": {site: [record, ...]};
+        "list": [record, ...].
+        """
+        rows = self.db.execute(
+            "SELECT t.site, q.variation, r.data FROM requests q JOIN targets t ON t.id = q.target_id "
+            "JOIN responses r ON r.request_id = q.id WHERE q.run_id = ? ORDER BY q.id", (run_id,))
+        if shape == "list":
+            return [json.loads(data) for _, _, data in rows]
+        results = {}
+        for site, variation, data in rows:
+            if shape == "grouped":
+                results.setdefault(site, []).append(json.loads(data))
+            else:
+                results.setdefault(site, {})[variation] = json.loads(data)
+        return results
+
+    def latest_results(self, script, shape="nested"):
+        """run_results of the script's latest finished run, or None if it never ran."""
+        run_id = self.latest_run(script)
+        return self.run_results(run_id, shape) if run_id else None
+
+    def header_history(self, host, header="Server"):
+        """
+        When a host's response header changed: [(run_id, script, sent_at, value)].
+
+        Only responses whose value differs from the previous one are listed.
+        """
+        column = {"server": "server", "content-type": "content_type"}.get(header.lower())
+        value_sql = f"r.{column}" if column else "r.headers"
+        rows = self.db.execute(
+            f"SELECT q.run_id, u.script, q.sent_at, {value_sql} FROM targets t "
+            f"JOIN requests q ON q.target_id = t.id JOIN runs u ON u.id = q.run_id "
+            f"JOIN responses r ON r.request_id = q.id "
+            f"WHERE t.host = ? AND r.error IS NULL ORDER BY q.sent_at", (host,))
+        history, last = [], object()
+        for run_id, script, sent_at, value in rows:
+            if not column:
+                value = next((v for k, v in json.loads(value or "{}").items() if k.lower() == header.lower()),
+                             None)
+            if value != last:
+                history.append((run_id, script, sent_at, value))
+                last = value
+        return history
+
+
+def save_run(script, records, path=STORE_FILE):
+    """
+    Store a finished script run in one go.
+
+    records is an iterable of (site, variation, request_headers, result); a
+    result's "sent_at" (set by probe_engine) is stored as its send time.
+    Returns the run id.
+    """
+    with ResultStore(path) as store:
+        run_id = store.start_run(script)
+        for site, variation, request_headers, result in records:
+            store.record(run_id, site, variation, result, request_headers, result.get("sent_at"))
+        store.finish_run(run_id)
+    return run_id
+
+
+if __name__ == "__main__":
+    # python result_store.py runs | history <host> [header]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("runs", "history") or (sys.argv[1] == "history" and len(sys.argv) < 3):
+        print("Usage: python result_store.py runs | history <host> [header]")
+        sys.exit(1)
+    with ResultStore() as store:
+        if sys.argv[1] == "runs":
+            for run_id, script, started, count in store.db.execute(
+                    "SELECT u.id, u.script, u.started, COUNT(q.id) FROM runs u "
+                    "LEFT JOIN requests q ON q.run_id = u.id GROUP BY u.id ORDER BY u.started"):
+                print(f"  run {run_id:<5} {time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}  "
+                      f"{script:30} {count:6} responses")
+        else:
+            header = sys.argv[3] if len(sys.argv) > 3 else "Server"
+            for run_id, script, sent_at, value in store.header_history(sys.argv[2], header):
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sent_at))
+                print(f"  {when}  run {run_id:<5} {script:30} {header}: {value}")
@@ -0,0 +1,51 @@
+# test_body_archive.py - Delta-compressed objects must round-trip and stay small
+
+import random
+
+from body_archive import MAX_CHAIN, BodyArchive
+
+
+def _page(size, seed=1):
+    rng = random.Random(seed)
+    words = [bytes(rng.choice(b"abcdefghijklmnop") for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    out = bytearray()
+    while len(out) < size:
+        out += rng.choice(words) + b" "
+    return bytes(out[:size])
+
+
+def test_large_variation_is_stored_as_a_delta(tmp_path):
+    archive = BodyArchive(tmp_path)
+    base = _page(300 * 1024)
+    variation = bytearray(base)
+    variation[1000:1000] = b"<p>inserted</p>" * 100
+    del variation[150000:150500]
+    variation[250000:250010] = b"changed!!!"
+    variation = bytes(variation)
+
+    base_key = archive.put(base)
+    key = archive.put(variation, base_key)
+
+    assert archive.get(key) == variation
+    assert archive._path(key).stat().st_size < len(variation) // 20
+
+
+def test_delta_chains_are_capped(tmp_path):
+    archive = BodyArchive(tmp_path)
+    data = _page(20 * 1024)
+    key = archive.put(data)
+    for i in range(MAX_CHAIN * 2):
+        data += b" %d" % i
+        key = archive.put(data, key)
+        assert archive.get(key) == data
+        assert len(archive._chain(key)) <= MAX_CHAIN
+
+
+def test_stats_reads_sizes_without_decoding(tmp_path, monkeypatch):
+    archive = BodyArchive(tmp_path)
+    base = archive.put(_page(50 * 1024))
+    archive.put(b"", base)
+    archive.put(b"<html></html>", base)
+    monkeypatch.setattr(archive, "get", None)
+    assert archive.stats()["objects"] == 3
+    assert archive.stats()["original_bytes"] == 50 * 1024 + len(b"<html></html>")
@@ -0,0 +1,88 @@
+# test_html_parity.py - Parser backends and the streaming extractor must extract the same title/meta/forms/text
+
+from pathlib import Path
+
+import pytest
+
+from html_analysis import DEFAULT_PARSER, PARSER, available_parsers, check_parity, extract_page
+from page_stream import extract_stream
+
+FIXTURES = Path(__file__).parent / "fixtures" / "malformed"
+REPO = Path(__file__).resolve().parent.parent
+PAGES = sorted(FIXTURES.glob("*.html")) + [REPO / "scanme.html"]
+OTHER_BACKENDS = [p for p in available_parsers() if p != DEFAULT_PARSER]
+
+# (backend, fixture) pairs whose trees differ from html.parser. These keep
+# html.parser the default; an xfail that starts passing fails the suite so
+# the list stays accurate.
+KNOWN_DIFFERENCES = {
+    ("lxml", "nested_forms.html"): "libxml2 drops the inner <form> start tag",
+    ("lxml", "title_comment.html"): "libxml2 keeps <title> content as raw text",
+    ("lxml", "title_markup.html"): "libxml2 keeps <title> content as raw text",
+    ("lxml", "cdata.html"): "libxml2 treats CDATA sections as comments",
+    ("lxml", "unclosed_title.html"): "libxml2 swallows the rest of the page into <title>",
+    ("lxml", "void_tags.html"): "libxml2 keeps the first of two duplicate attributes",
+}
+
+
+def _id(path):
+    return path.name
+
+
+def test_default_backend_is_html_parser():
+    assert DEFAULT_PARSER == "html.parser"
+    assert PARSER in available_parsers()
+
+
+@pytest.mark.parametrize("page", PAGES, ids=_id)
+@pytest.mark.parametrize("backend", OTHER_BACKENDS)
+def test_backend_matches_html_parser(backend, page, request):
+    reason = KNOWN_DIFFERENCES.get((backend, page.name))
+    if reason:
+        request.applymarker(pytest.mark.xfail(reason=reason, strict=True))
+    assert check_parity(page.read_bytes(), parsers=[DEFAULT_PARSER, backend]) == {}
+
+
+def test_nested_forms_keep_outer_inputs():
+    page = extract_page("http://h/", (FIXTURES / "nested_forms.html").read_bytes(), parser=DEFAULT_PARSER)
+    assert [f["action"] for f in page["forms"]] == ["http://h/a", "http://h/b"]
+    assert [i["name"] for i in page["forms"][0]["inputs"]] == ["x", "y", "z"]
+    assert [i["name"] for i in page["forms"][1]["inputs"]] == ["y"]
+
+
+def test_markup_in_title_gives_no_title():
+    for name in ("title_comment.html", "title_markup.html"):
+        page = extract_page("http://h/", (FIXTURES / name).read_bytes(), parser=DEFAULT_PARSER)
+        assert page["title"] is None
+
+
+def test_nul_bytes_are_dropped():
+    page = extract_page("http://h/", (FIXTURES / "nul_bytes.html").read_bytes(), parser=DEFAULT_PARSER)
+    assert page["title"] == "ab"
+    assert page["meta_description"] == "de"
+    assert page["forms"][0]["inputs"][0]["name"] == "nm"
+
+
+@pytest.mark.parametrize("page", PAGES, ids=_id)
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, None])
+def test_stream_matches_extract_page(chunk_size, page):
+    data = page.read_bytes()
+    size = chunk_size or len(data)
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    assert extract_stream("http://h/", chunks) == extract_page("http://h/", data, parser=DEFAULT_PARSER)
+
+
+@pytest.mark.parametrize("html", [
+    b"<title>x<!-- c -->y</title>",
+    b"<title>a<b>bold</b></title>",
+    b"<title>a</x>b</title>",
+])
+def test_stream_title_follows_title_string(html):
+    assert extract_page("http://h/", html, parser=DEFAULT_PARSER)["title"] is None
+    assert extract_stream("http://h/", [html])["title"] is None
+
+
+def test_stream_title_with_single_nested_text():
+    html = b"<title><b> only </b></title>"
+    assert extract_stream("http://h/", [html])["title"] == "only"
+    assert extract_page("http://h/", html, parser=DEFAULT_PARSER)["title"] == "only"
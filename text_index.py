@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# text_index.py - Persistent inverted index over fetched page text (term -> page, run, positions)
+
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+import urllib.parse
+from array import array
+from collections import defaultdict
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_index.db")
+TOKEN = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT UNIQUE NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    document_id INTEGER NOT NULL REFERENCES documents(id)
+);
+CREATE INDEX IF NOT EXISTS snapshots_document ON snapshots(document_id);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    document_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term_id, document_id)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text):
+    """Lowercased word tokens of a text, in order."""
+    return TOKEN.findall(text.lower())
+
+
+def _positions(blob):
+    positions = array("I")
+    positions.frombytes(blob)
+    return positions
+
+
+class TextIndex:
+    """
+    Inverted index kept in SQLite.
+
+    Every fetch is a snapshot (run, url) pointing at a document; identical
+    page text is stored and indexed once however many runs saw it, so adding
+    a run only costs the pages whose text changed. Postings hold each term's
+    token positions per document, which also answers phrase queries.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._term_ids = {}
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, label=None):
+        """Open a new run (one crawl or script invocation); returns its id."""
+        cur = self.db.execute("INSERT INTO runs (started, label) VALUES (?, ?)", (time.time(), label))
+        self.db.commit()
+        return cur.lastrowid
+
+    def _term_id(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            self.db.execute("INSERT OR IGNORE INTO terms (term) VALUES (?)", (term,))
+            term_id = self.db.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchone()[0]
+            self._term_ids[term] = term_id
+        return term_id
+
+    def add(self, run_id, url, text):
+        """Record that url had this text in run_id, indexing the text if it is new."""
+        sha = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+        with self.db:
+            row = self.db.execute("SELECT id FROM documents WHERE sha256 = ?", (sha,)).fetchone()
+            if row:
+                document_id = row[0]
+            else:
+                tokens = tokenize(text)
+                document_id = self.db.execute(
+                    "INSERT INTO documents (sha256, tokens) VALUES (?, ?)", (sha, len(tokens))).lastrowid
+                positions = defaultdict(lambda: array("I"))
+                for i, token in enumerate(tokens):
+                    positions[token].append(i)
+                self.db.executemany(
+                    "INSERT INTO postings (term_id, document_id, count, positions) VALUES (?, ?, ?, ?)",
+                    [(self._term_id(term), document_id, len(pos), pos.tobytes())
+                     for term, pos in positions.items()])
+            self.db.execute(
+                "INSERT INTO snapshots (run_id, url, host, document_id) VALUES (?, ?, ?, ?)",
+                (run_id, url, urllib.parse.urlsplit(url).hostname or url, document_id))
+        return document_id
+
+    def _documents(self, term):
+        """{document_id: positions} for a single term."""
+        rows = self.db.execute(
+            "SELECT p.document_id, p.positions FROM postings p JOIN terms t ON t.id = p.term_id "
+            "WHERE t.term = ?", (term,))
+        return {doc: _positions(blob) for doc, blob in rows}
+
+    def _match(self, query):
+        """{document_id: start positions} for a word or phrase."""
+        words = tokenize(query)
+        if not words:
+            return {}
+        matches = {doc: list(pos) for doc, pos in self._documents(words[0]).items()}
+        for offset, word in enumerate(words[1:], 1):
+            following = self._documents(word)
+            for doc in list(matches):
+                later = set(following.get(doc, ()))
+                matches[doc] = [p for p in matches[doc] if p + offset in later]
+                if not matches[doc]:
+                    del matches[doc]
+        return matches
+
+    def query(self, query, positions=False):
+        """
+        Every snapshot whose text contains the word or phrase.
+
+        Returns [{run, started, url, host, count[, positions]}] ordered by run
+        then url; positions are token offsets into the page text.
+        """
+        matches = self._match(query)
+        if not matches:
+            return []
+        marks = ",".join("?" * len(matches))
+        rows = self.db.execute(
+            f"SELECT s.run_id, r.started, s.url, s.host, s.document_id FROM snapshots s "
+            f"JOIN runs r ON r.id = s.run_id WHERE s.document_id IN ({marks}) ORDER BY s.run_id, s.url",
+            list(matches))
+        hits = []
+        for run_id, started, url, host, doc in rows:
+            hit = {"run": run_id, "started": started, "url": url, "host": host, "count": len(matches[doc])}
+            if positions:
+                hit["positions"] = matches[doc]
+            hits.append(hit)
+        return hits
+
+    def hosts(self, query):
+        """{host: total occurrences} for hosts that ever exposed the word or phrase."""
+        totals = defaultdict(int)
+        for hit in self.query(query):
+            totals[hit["host"]] += hit["count"]
+        return dict(totals)
+
+    def stats(self):
+        return {
+            table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("runs", "snapshots", "documents", "terms", "postings")
+        }
+
+
+if __name__ == "__main__":
+    # python text_index.py query <term or phrase> [--positions] | hosts <term> | stats
+    if len(sys.argv) < 2 or sys.argv[1] not in ("query", "hosts", "stats"):
+        print("Usage: python text_index.py query <term> [--positions] | hosts <term> | stats")
+        sys.exit(1)
+    command = sys.argv[1]
+    args = [a for a in sys.argv[2:] if a != "--positions"]
+    with TextIndex() as index:
+        start = time.perf_counter()
+        if command == "stats":
+            for table, count in index.stats().items():
+                print(f"  {table:10} {count:8}")
+        elif command == "hosts":
+            for host, count in sorted(index.hosts(" ".join(args)).items()):
+                print(f"  {host:40} {count:6} occurrences")
+        else:
+            for hit in index.query(" ".join(args), positions="--positions" in sys.argv):
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(hit["started"]))
+                line = f"  run {hit['run']:<4} {when}  {hit['url']:<45} {hit['count']:5}x"
+                if "positions" in hit:
+                    line += f"  at {hit['positions'][:20]}"
+                print(line)
+        print(f"\n({(time.perf_counter() - start) * 1000:.1f} ms)")
@@ -5,6 +5,11 @@ import requests
 import json
 from tabulate import tabulate
 
+from probe_engine import run_probes
+from rate_limit import HostRateLimiter, print_rate_limits
+from response_stream import read_body
+from waf_signatures import default_signatures
+
 USER_AGENTS = {
     "mozilla": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
     "curl": "curl/7.68.0",
@@ -21,92 +26,70 @@ sites = [
     "https://www.github.com",
 ]
 
-print("=" * 100)
-print("WAF/BOT PROTECTION DETECTION - Testing Real-World Sites")
-print("=" * 100)
-print("\nNote: These sites likely have advanced protection mechanisms\n")
-
-results = {}
+# Body, header and status rules come from waf_signatures.json. These are the
+# same compiled signatures page_analyzer's "waf" extractor uses, but this script
+# stays on probe_engine rather than analyze_urls: it sends each site four
+# different User-Agents with per-host backoff and retries, and scores bodies
+# as they stream in under a byte cap, while analyze_urls fetches every URL
+# once with default headers and keeps the whole page for parsing.
+signatures = default_signatures()
 
-for site in sites:
-    print(f"\n{'='*100}")
-    print(f"Testing: {site}")
-    print(f"{'='*100}\n")
+def build_result(job, r):
+    site, headers, ua_name = job
+    body = read_body(r, indicators=(), waf=signatures)
+    waf = body["waf"]
     
-    site_results = []
+    row = {
+        "User-Agent": ua_name.upper(),
+        "Status": r.status_code,
+        "Content-Type": r.headers.get("Content-Type", "---")[:40],
+        "Length": body["length"],
+        "Server": r.headers.get("Server", "---")[:30],
+        "CF-Ray": "✓ Cloudflare" if "cf-ray" in r.headers else "✗",
+    }
     
-    for ua_name, ua_string in USER_AGENTS.items():
-        headers = {"User-Agent": ua_string}
-        
-        try:
-            r = requests.get(site, headers=headers, timeout=10, allow_redirects=True)
-            
-            result = {
-                "User-Agent": ua_name.upper(),
-                "Status": r.status_code,
-                "Content-Type": r.headers.get("Content-Type", "---")[:40],
-                "Length": len(r.text),
-                "Server": r.headers.get("Server", "---")[:30],
-                "CF-Ray": "✓ Cloudflare" if "cf-ray" in r.headers else "✗",
-            }
-            
-            # Check for common WAF indicators
-            waf_indicators = []
-            if r.status_code in [403, 429, 503]:
-                waf_indicators.append(f"Status {r.status_code}")
-            if "blocked" in r.text.lower():
-                waf_indicators.append("'blocked' in content")
-            if "cloudflare" in r.text.lower():
-                waf_indicators.append("Cloudflare detected")
-            if "access denied" in r.text.lower():
-                waf_indicators.append("'access denied' in content")
-            
-            if waf_indicators:
-                result["WAF Indicators"] = ", ".join(waf_indicators)
-            
-            site_results.append(result)
-            results[site] = {
-                "ua": ua_name,
-                "status": r.status_code,
-                "server": r.headers.get("Server", ""),
-                "length": len(r.text),
-                "waf_indicators": waf_indicators,
-            }
-            
-        except requests.exceptions.Timeout:
-            site_results.append({
-                "User-Agent": ua_name.upper(),
-                "Status": "TIMEOUT",
-                "Content-Type": "---",
-                "Length": "---",
-                "Server": "---",
-                "CF-Ray": "---",
-            })
-            print(f"  ⏱️  {ua_name}: TIMEOUT")
-            
-        except requests.exceptions.ConnectionError as e:
-            site_results.append({
-                "User-Agent": ua_name.upper(),
-                "Status": "BLOCKED",
-                "Content-Type": "---",
-                "Length": "---",
-                "Server": "---",
-                "CF-Ray": "---",
-            })
-            print(f"  🚫 {ua_name}: CONNECTION BLOCKED")
-            
-        except Exception as e:
-            print(f"  ❌ {ua_name}: {type(e).__name__}")
+    # Signatures that fired (status, headers, body markers), scored per vendor
+    waf_indicators = waf["matches"]
+    if waf["detected"]:
+        row["WAF"] = f"{waf['vendor'] or 'Generic'} ({waf['score']})"
+    if waf_indicators:
+        row["WAF Indicators"] = ", ".join(waf_indicators)
     
-    if site_results:
-        print(tabulate(site_results, headers="keys", tablefmt="grid"))
+    return {
+        "row": row,
+        "result": {
+            "ua": ua_name,
+            "status": r.status_code,
+            "server": r.headers.get("Server", ""),
+            "length": body["length"],
+            "truncated": body["truncated"],
+            "waf_indicators": waf_indicators,
+            "waf_vendor": waf["vendor"],
+            "waf_score": waf["score"],
+        },
+    }
 
-# Analysis
-print(f"\n\n{'='*100}")
-print("ANALYSIS & OBSERVATIONS")
-print(f"{'='*100}\n")
+def build_error(job, e):
+    site, headers, ua_name = job
+    if isinstance(e, requests.exceptions.Timeout):
+        status, message = "TIMEOUT", f"  ⏱️  {ua_name}: TIMEOUT"
+    elif isinstance(e, requests.exceptions.ConnectionError):
+        status, message = "BLOCKED", f"  🚫 {ua_name}: CONNECTION BLOCKED"
+    else:
+        return {"message": f"  ❌ {ua_name}: {type(e).__name__}"}
+    return {
+        "message": message,
+        "row": {
+            "User-Agent": ua_name.upper(),
+            "Status": status,
+            "Content-Type": "---",
+            "Length": "---",
+            "Server": "---",
+            "CF-Ray": "---",
+        },
+    }
 
-print("""
+ANALYSIS = """
 Key Findings:
 
 1. CLOUDFLARE PROTECTION:
@@ -140,6 +123,56 @@ RECOMMENDATION: For authorized security testing, use:
 - Slow request rates to avoid rate limiting
 - Proper authentication headers
 - Coordination with site owners (responsible disclosure)
-""")
+"""
+
+def main():
+    """Probe each site with every User-Agent and report the WAF signatures that fired."""
+    print("=" * 100)
+    print("WAF/BOT PROTECTION DETECTION - Testing Real-World Sites")
+    print("=" * 100)
+    print("\nNote: These sites likely have advanced protection mechanisms\n")
+
+    results = {}
+
+    # Back off per host on 429/503 and retry throttled responses before recording them
+    limiter = HostRateLimiter()
+
+    # Probe every site x User-Agent pair concurrently, then report site by site
+    jobs = [(site, {"User-Agent": ua_string}, ua_name)
+            for site in sites for ua_name, ua_string in USER_AGENTS.items()]
+    outcomes = {}
+    for (site, _, _), outcome in zip(jobs, run_probes(jobs, build_result, build_error, timeout=10,
+                                                              stream=True, limiter=limiter, retries=2)):
+        outcomes.setdefault(site, []).append(outcome)
+
+    for site in sites:
+        print(f"\n{'='*100}")
+        print(f"Testing: {site}")
+        print(f"{'='*100}\n")
+    
+        site_results = []
+    
+        for outcome in outcomes.get(site, []):
+            if "message" in outcome:
+                print(outcome["message"])
+            if "row" in outcome:
+                site_results.append(outcome["row"])
+            if "result" in outcome:
+                results[site] = outcome["result"]
+    
+        if site_results:
+            print(tabulate(site_results, headers="keys", tablefmt="grid"))
+
+    print_rate_limits(limiter)
+
+    # Analysis
+    print(f"\n\n{'='*100}")
+    print("ANALYSIS & OBSERVATIONS")
+    print(f"{'='*100}\n")
+
+    print(ANALYSIS)
+
+    print(f"✓ Analysis complete")
 
-print(f"✓ Analysis complete")
+if __name__ == "__main__":
+    main()
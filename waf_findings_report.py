@@ -1,20 +1,10 @@
 #!/usr/bin/env python3
 # waf_findings_report.py - Generate detailed WAF findings report
 
-import json
 from tabulate import tabulate
 
-# Load the fuzzing results
-with open("/workspaces/Lab-4.1/advanced_header_fuzzing.json") as f:
-    fuzzing_data = json.load(f)
-
-print("=" * 140)
-print("WAF DETECTION & HEADER FUZZING - COMPREHENSIVE FINDINGS REPORT")
-print("=" * 140)
-
-print("\n📊 CLOUDFLARE.COM ANALYSIS")
-print("-" * 140)
-print("""
+# Findings from the recorded runs
+CLOUDFLARE_FINDINGS = """
 FINDINGS:
 ✓ Site uses Cloudflare WAF (CF-Ray header present)
 ✓ All requests returned 200 OK (no explicit blocking)
@@ -35,11 +25,9 @@ INTERPRETATION:
 - The consistent CF-Ray values suggest all requests were processed
 
 IMPACT: Medium - Detection works, but no explicit blocking occurred
-""")
+"""
 
-print("\n📊 AMAZON.COM ANALYSIS")
-print("-" * 140)
-print("""
+AMAZON_FINDINGS = """
 FINDINGS:
 ⚠️  Amazon returns CHALLENGE PAGES for suspicious headers
 ✓ Clearly detected referer spoofing and sqlmap signature
@@ -64,13 +52,9 @@ The presence of "challenge" and "verify" strings indicates Amazon serves
 a JavaScript challenge (likely similar to Cloudflare's) to verify human users.
 
 IMPACT: High - Effective bot/scanner detection with graduated responses
-""")
-
-print("\n" + "=" * 140)
-print("CROSS-SITE VULNERABILITY ANALYSIS")
-print("=" * 140)
+"""
 
-analysis = {
+CROSS_SITE_ANALYSIS = {
     "Header": [
         "X-Forwarded-For",
         "Suspicious Referer",
@@ -101,14 +85,7 @@ analysis = {
     ]
 }
 
-print("\n")
-print(tabulate(analysis, headers="keys", tablefmt="grid"))
-
-print("\n" + "=" * 140)
-print("DEFENSIVE RECOMMENDATIONS")
-print("=" * 140)
-
-recommendations = """
+RECOMMENDATIONS = """
 FOR LEGITIMATE SECURITY TESTING:
 
 1. HEADER AVOIDANCE:
@@ -141,13 +118,7 @@ FOR LEGITIMATE SECURITY TESTING:
    ⚠️  Report vulnerabilities through proper channels
 """
 
-print(recommendations)
-
-print("=" * 140)
-print("TECHNICAL SUMMARY")
-print("=" * 140)
-
-summary = """
+TECHNICAL_SUMMARY = """
 KEY TECHNICAL INSIGHTS:
 
 1. RESPONSE CONTENT ANALYSIS:
@@ -182,12 +153,7 @@ KEY TECHNICAL INSIGHTS:
    - Even "trusted" headers like X-Forwarded-For can reveal intentions
 """
 
-print(summary)
-
-print("=" * 140)
-print("EXERCISE COMPLETION")
-print("=" * 140)
-print("""
+EXERCISE_COMPLETION = """
 ✓ Header fuzzing completed on multiple sites
 ✓ Logged all changes in response status, body, and headers
 ✓ Identified WAF protection mechanisms
@@ -198,4 +164,42 @@ FILES GENERATED:
 - header_fuzzing_results.json         (Simple HTTP tests)
 - advanced_header_fuzzing.json        (WAF-protected sites analysis)
 - This comprehensive report
-""")
+"""
+
+def main():
+    """Print the findings report."""
+    print("=" * 140)
+    print("WAF DETECTION & HEADER FUZZING - COMPREHENSIVE FINDINGS REPORT")
+    print("=" * 140)
+    
+    print("\n📊 CLOUDFLARE.COM ANALYSIS")
+    print("-" * 140)
+    print(CLOUDFLARE_FINDINGS)
+    
+    print("\n📊 AMAZON.COM ANALYSIS")
+    print("-" * 140)
+    print(AMAZON_FINDINGS)
+    
+    print("\n" + "=" * 140)
+    print("CROSS-SITE VULNERABILITY ANALYSIS")
+    print("=" * 140)
+    print("\n")
+    print(tabulate(CROSS_SITE_ANALYSIS, headers="keys", tablefmt="grid"))
+    
+    print("\n" + "=" * 140)
+    print("DEFENSIVE RECOMMENDATIONS")
+    print("=" * 140)
+    print(RECOMMENDATIONS)
+    
+    print("=" * 140)
+    print("TECHNICAL SUMMARY")
+    print("=" * 140)
+    print(TECHNICAL_SUMMARY)
+    
+    print("=" * 140)
+    print("EXERCISE COMPLETION")
+    print("=" * 140)
+    print(EXERCISE_COMPLETION)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# waf_signatures.py - Score responses against the WAF signature file in one pass
+
+import json
+import os
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+from keyword_matcher import KeywordMatcher
+
+SIGNATURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "waf_signatures.json")
+DEFAULT_THRESHOLD = 3
+
+
+class WafSignatures:
+    """
+    Compiled form of a signature list.
+
+    Each signature has a vendor, a name, a weight, an optional category
+    ("block", "challenge", ...) and exactly one trigger: "body" (substring,
+    case-insensitive), "header" (present, optionally "contains" a value) or
+    "status". Body patterns share one KeywordMatcher, headers and statuses are
+    dict lookups, so scoring a response costs one scan of the body plus one
+    look at each response header however many signatures there are.
+    """
+
+    def __init__(self, signatures, threshold=DEFAULT_THRESHOLD):
+        self.signatures = list(signatures)
+        self.threshold = threshold
+        self._body = defaultdict(list)      # lowercased pattern -> signatures
+        self._headers = defaultdict(list)   # lowercased header name -> signatures
+        self._status = defaultdict(list)    # status code -> signatures
+        for sig in self.signatures:
+            triggers = [key for key in ("body", "header", "status") if key in sig]
+            if len(triggers) != 1 or "vendor" not in sig or "name" not in sig:
+                raise ValueError(f"bad WAF signature (need vendor, name and one of body/header/status): {sig}")
+            if "body" in sig:
+                self._body[sig["body"].lower()].append(sig)
+            elif "header" in sig:
+                self._headers[sig["header"].lower()].append(sig)
+            else:
+                self._status[int(sig["status"])].append(sig)
+        self.matcher = KeywordMatcher(self._body, ignore_case=True, binary=True)
+        # Longest body pattern - 1: bytes carried between chunks so no match is split
+        self.overlap = max((len(p.encode()) for p in self._body), default=1) - 1
+
+    def scanner(self):
+        """A BodyScanner for feeding one response body chunk by chunk."""
+        return BodyScanner(self)
+
+    def classify(self, status=None, headers=None, body=b""):
+        """Score a complete response; body may be bytes, str or an mmap."""
+        scanner = self.scanner()
+        scanner.update(body.encode() if isinstance(body, str) else body)
+        return self.score(status, headers, scanner.found)
+
+    def score(self, status, headers, body_patterns):
+        """
+        Combine status, header and already-found body patterns into a verdict.
+
+        Returns {"detected", "score", "vendor", "vendors", "categories",
+        "matches"}: vendor is the best-scoring non-generic vendor (or None),
+        matches lists the names of the signatures that fired.
+        """
+        fired = list(self._status.get(status, ()))
+        for name, value in (headers or {}).items():
+            for sig in self._headers.get(name.lower(), ()):
+                if "contains" not in sig or sig["contains"].lower() in str(value).lower():
+                    fired.append(sig)
+        for pattern in sorted(body_patterns):
+            fired.extend(self._body[pattern])
+
+        vendors = defaultdict(int)
+        categories = set()
+        for sig in fired:
+            vendors[sig["vendor"]] += sig.get("weight", 1)
+            if sig.get("category"):
+                categories.add(sig["category"])
+        total = sum(vendors.values())
+        named = {v: s for v, s in vendors.items() if v != "Generic"}
+        return {
+            "detected": total >= self.threshold,
+            "score": total,
+            "vendor": max(named, key=named.get) if named else None,
+            "vendors": dict(vendors),
+            "categories": sorted(categories),
+            "matches": [sig["name"] for sig in fired],
+        }
+
+
+class BodyScanner:
+    """Incremental body matching for one response; found holds the patterns seen so far."""
+
+    def __init__(self, signatures):
+        self._matcher = signatures.matcher
+        self._overlap = signatures.overlap
+        self._tail = b""
+        self.found = set()
+
+    def update(self, chunk):
+        window = self._tail + bytes(chunk)
+        for _, pattern in self._matcher.finditer(window):
+            self.found.add(pattern)
+        self._tail = window[-self._overlap:] if self._overlap else b""
+
+
+def load_signatures(path=SIGNATURE_FILE):
+    """Read and compile a signature file ({"threshold": n, "signatures": [...]})."""
+    with open(path) as f:
+        data = json.load(f)
+    return WafSignatures(data["signatures"], data.get("threshold", DEFAULT_THRESHOLD))
+
+
+@lru_cache(maxsize=None)
+def default_signatures():
+    """The bundled waf_signatures.json, compiled once per process."""
+    return load_signatures()
+
+
+if __name__ == "__main__":
+    # python waf_signatures.py [signatures.json] : validate a signature file and list its vendors
+    db = load_signatures(sys.argv[1] if len(sys.argv) > 1 else SIGNATURE_FILE)
+    per_vendor = defaultdict(int)
+    for sig in db.signatures:
+        per_vendor[sig["vendor"]] += 1
+    print(f"✓ {len(db.signatures)} signatures, detection threshold {db.threshold}")
+    for vendor, count in sorted(per_vendor.items()):
+        print(f"  {vendor:20} {count:3} rules")